@@ -1,11 +1,37 @@
+"""
+Rule-based + zero-shot issue tagging for scraped eBay feedback.
+
+Importing this module is cheap: pandas and transformers are only imported
+when a DataFrame is classified or the zero-shot model is first needed.
+Run `python AIAnalysis.py --help` for the command line.
+"""
+import argparse
 import os
 import re
-import pandas as pd
+import time
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from rapidfuzz import fuzz
-from transformers import pipeline
+from KeywordMatcher import KeywordMatcher
+from ClassificationCache import ClassificationCache, taxonomy_version
+from RunMetrics import METRICS, add_metrics_args, finish_from_args, start_from_args
 
 # ========= Config =========
 CSV_PATH = "test.csv"
+OUT_PATH = "negative_reviews.csv"
+MODEL_ID = "facebook/bart-large-mnli"
+AI_BATCH_SIZE = 16
+CHUNK_SIZE = 100_000  # rows per chunk in streaming mode
+MIN_CONF = 0.70
+TOPK = 3
+FUZZY_THRESHOLD = 95
+BACKENDS = ("nli", "embed")  # AI fallback: NLI zero-shot per label, or one sentence embedding per comment
+
+# persistent classification cache (set to None to disable)
+CACHE_PATH = "classification_cache.sqlite"
+CACHE_MAX_ENTRIES = 1_000_000
+DEDUP_THRESHOLD = 0.9  # --dedup default (CommentDedup itself is imported lazily; it pulls in numpy)
 
 HARD_NEGATIVE_ISSUES = {
     "Fake or counterfeit",
@@ -28,23 +54,7 @@ POSITIVE_WORDS = {
     "looks new","like new","no scratches","no scratch","no cracks","no crack"
 }
 
-# ========= Load =========
-if not os.path.exists(CSV_PATH):
-    raise FileNotFoundError(os.path.abspath(CSV_PATH))
-
-df = pd.read_csv(CSV_PATH)
-req = {"comment","rating_type"}
-if not req.issubset(df.columns):
-    raise ValueError(f"CSV must include {req}")
-
-# normalize comments
-def normalize_quotes(s: str) -> str:
-    return (s.replace("“","\"").replace("”","\"")
-             .replace("’","'").replace("‘","'")
-             .replace("–","-").replace("—","-"))
-
-df["comment"] = df["comment"].fillna("").astype(str).map(normalize_quotes)
-df = df[~df["comment"].str.strip().str.lower().isin({"ok","fine","good","meh","nice","cool"})].copy()
+STOP_COMMENTS = {"ok","fine","good","meh","nice","cool"}
 
 # ========= Categories / Keywords =========
 ISSUE_CATEGORIES = [
@@ -84,11 +94,45 @@ ISSUE_KEYWORDS = {
     "Great communication": ["kept me informed","great communication","good communication"]
 }
 
+# every label an issue set can hold: one bit each in the `issue_mask` column
+ISSUE_LABELS = ISSUE_CATEGORIES + ["Damaged product (severe)"]
+ISSUE_BITS = {lbl: 1 << i for i, lbl in enumerate(ISSUE_LABELS)}
+ISSUE_MASK_DTYPE = "uint32" if len(ISSUE_LABELS) <= 32 else "uint64"
+SENTIMENTS = ["POSITIVE", "NEGATIVE", "NEUTRAL"]  # final_sentiment categories (others are added as seen)
+
 # modifiers for damage severity
 SEVERE_MODS = {"excessive","large","deep","pronounced","many","a lot","tons","way more","significant","big","heavy"}
 MINOR_MODS  = {"tiny","small","minor","light","hairline","couple","few","not visible","barely visible","only"}
 
+# cracked/shattered are always severe
+SEVERE_DAMAGE_WORDS = ["crack","cracked","shatter","shattered","chip","chipped"]
+
+# built once; finds every keyword, modifier and negation cue in one scan per comment
+MATCHER = KeywordMatcher(ISSUE_KEYWORDS, SEVERE_MODS, MINOR_MODS, POSITIVE_WORDS,
+                         extra_phrases=SEVERE_DAMAGE_WORDS)
+
+# anything that changes rule hits goes into the results cache key
+TAXONOMY_VERSION = taxonomy_version(ISSUE_CATEGORIES, ISSUE_KEYWORDS, SEVERE_MODS, MINOR_MODS,
+                                    POSITIVE_WORDS, SEVERE_DAMAGE_WORDS)
+
 # ========= Helpers =========
+def encode_issues(issues) -> int:
+    mask = 0
+    for lbl in issues:
+        mask |= ISSUE_BITS[lbl]
+    return mask
+
+@lru_cache(maxsize=None)
+def decode_issues(mask: int) -> tuple[str, ...]:
+    """Labels set in an issue mask, sorted like finalize_issues' lists."""
+    mask = int(mask)
+    return tuple(sorted(lbl for lbl, bit in ISSUE_BITS.items() if mask & bit))
+
+QUOTE_TABLE = str.maketrans({"“": "\"", "”": "\"", "’": "'", "‘": "'", "–": "-", "—": "-"})
+
+def normalize_quotes(s: str) -> str:
+    return s.translate(QUOTE_TABLE)
+
 def has_negation_window(text: str, kw: str, max_gap=3) -> bool:
     """
     Detect negation within a small window before keyword.
@@ -100,31 +144,21 @@ def has_negation_window(text: str, kw: str, max_gap=3) -> bool:
 def fuzzy_hit(text: str, kw: str, threshold=95) -> bool:
     return fuzz.partial_ratio(kw, text) >= threshold
 
-def detect_damage_with_severity(text: str, original_rating: str) -> str | None:
+def detect_damage_with_severity(text: str, original_rating: str, scan=None) -> str | None:
     t = text.lower()
-    any_damage_word = False
-    severe_hint = False
-    minor_hint = False
-
-    for kw in ISSUE_KEYWORDS["Damaged product"]:
-        if has_negation_window(t, kw):  # e.g., "no scratches"
-            continue
-        if fuzzy_hit(t, kw):
-            any_damage_word = True
+    scan = scan or MATCHER.scan(t)
 
+    # e.g. "no scratches" is negated and doesn't count
+    any_damage_word = any(scan.keyword_hit(kw) for kw in ISSUE_KEYWORDS["Damaged product"])
     if not any_damage_word:
         return None
 
     # severity cues
-    for mod in SEVERE_MODS:
-        if mod in t:
-            severe_hint = True; break
-    for mod in MINOR_MODS:
-        if mod in t:
-            minor_hint = True
+    severe_hint = scan.any_present(SEVERE_MODS)
+    minor_hint = scan.any_present(MINOR_MODS)
 
     # cracked/shattered are always severe
-    if any(w in t for w in ["crack","cracked","shatter","shattered","chip","chipped"]):
+    if scan.any_present(SEVERE_DAMAGE_WORDS):
         severe_hint = True
 
     # if user rated Positive and damage is minor → don't tag as damage
@@ -133,24 +167,18 @@ def detect_damage_with_severity(text: str, original_rating: str) -> str | None:
 
     return "Damaged product (severe)" if severe_hint else "Damaged product"
 
-def match_issues_rule_based(text: str, original_rating: str, threshold=95) -> list[str]:
+def match_issues_rule_based(text: str, original_rating: str, threshold=FUZZY_THRESHOLD) -> list[str]:
     t = text.lower()
+    scan = MATCHER.scan(t)
     issues = set()
 
     # Special-case damage with severity
-    dmg = detect_damage_with_severity(text, original_rating)
+    dmg = detect_damage_with_severity(text, original_rating, scan)
     if dmg:
         issues.add(dmg)
 
-    # Generic keyword matching with negation guard
-    for issue, kws in ISSUE_KEYWORDS.items():
-        if issue.startswith("Damaged product"):
-            continue  # handled above
-        for kw in kws:
-            if has_negation_window(t, kw):
-                continue
-            if fuzzy_hit(t, kw, threshold=threshold):
-                issues.add(issue); break
+    # Generic keyword matching with negation guard (damage handled above)
+    issues |= MATCHER.issue_hits(scan, threshold, skip={"Damaged product"})
 
     # Conflict cleanup: Accurate vs Misleading
     if "Accurate description" in issues and "Misleading description" in issues:
@@ -160,18 +188,12 @@ def match_issues_rule_based(text: str, original_rating: str, threshold=95) -> li
             issues.discard("Misleading description")
 
     # If positive wording is strong, prefer positive product tags
-    if any(pw in t for pw in POSITIVE_WORDS):
+    if scan.any_present(POSITIVE_WORDS):
         issues.add("Good product")
 
     return sorted(issues)
 
-# zero-shot fallback (multi-label)
-zsc = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-
-def ai_fallback(text: str, min_conf=0.70, topk=3) -> list[str]:
-    if not text.strip():
-        return []
-    res = zsc(text, ISSUE_CATEGORIES, multi_label=True)
+def pick_ai_labels(res: dict, min_conf=MIN_CONF, topk=TOPK) -> list[str]:
     labels = []
     for lbl, score in zip(res["labels"], res["scores"]):
         if score >= min_conf:
@@ -180,13 +202,17 @@ def ai_fallback(text: str, min_conf=0.70, topk=3) -> list[str]:
             break
     return labels
 
-def finalize_issues(text: str, original_rating: str) -> list[str]:
-    rb = set(match_issues_rule_based(text, original_rating))
-    if not rb:
-        ai = set(ai_fallback(text))
-    else:
-        # Only let AI add *non-contradictory* extras
-        ai = set(ai_fallback(text)) - {"Misleading description"} if "Accurate description" in rb else set(ai_fallback(text))
+# finalize_issues' tie-break when the AI adds the other side of the description conflict
+MISLEADING_RE = re.compile(r"\bmisleading\b|\bnot as described\b")
+
+def finalize_issues(text: str, original_rating: str, ai_labels: list[str] | None = None,
+                    rule_hits: list[str] | None = None) -> list[str]:
+    """Merge rule hits with AI labels; runs the default analyzer's model if ai_labels is None."""
+    rb = set(match_issues_rule_based(text, original_rating) if rule_hits is None else rule_hits)
+    ai = set(default_analyzer().ai_fallback(text) if ai_labels is None else ai_labels)
+    # Only let AI add *non-contradictory* extras
+    if "Accurate description" in rb:
+        ai.discard("Misleading description")
     issues = rb | ai
 
     # If “Damaged product (severe)” and “Damaged product” both present → keep severe only
@@ -196,7 +222,7 @@ def finalize_issues(text: str, original_rating: str) -> list[str]:
     # Re-run description conflict in case AI added the other side
     if "Accurate description" in issues and "Misleading description" in issues:
         t = text.lower()
-        if re.search(r"\bmisleading\b|\bnot as described\b", t):
+        if MISLEADING_RE.search(t):
             issues.discard("Accurate description")
         else:
             issues.discard("Misleading description")
@@ -234,35 +260,766 @@ def override_sentiment(comment: str, issues: list[str], rating_type: str) -> str
 
     return rating_type.upper()
 
-# ========= Apply =========
-def apply_row(row):
-    comment = (row["comment"] or "").strip()
-    rating = (row["rating_type"] or "").strip()
-    if not comment:
-        return pd.Series([[], rating.upper() or "NEUTRAL"])
-    issues = finalize_issues(comment, rating)
-    sentiment = override_sentiment(comment, issues, rating)
-    return pd.Series([issues, sentiment])
+# ========= Column-wise stages =========
+def match_issues_bulk(comments, ratings, threshold=FUZZY_THRESHOLD) -> list[list[str]]:
+    """
+    match_issues_rule_based over aligned columns, once per distinct (comment, rating).
+    With metrics on, each rule-engine call is timed into rule_match_seconds.
+    """
+    timed = METRICS.enabled
+    took = []
+    seen = {}
+    out = []
+    for pair in zip(comments, ratings):
+        hit = seen.get(pair)
+        if hit is None:
+            start = time.perf_counter() if timed else 0.0
+            hit = seen[pair] = match_issues_rule_based(pair[0], pair[1], threshold)
+            if timed:
+                took.append(time.perf_counter() - start)
+        out.append(hit)
+    if timed:
+        METRICS.observe_many("rule_match_seconds", took)
+    return out
+
+def _issue_flags(issues) -> tuple[bool, bool, bool]:
+    s = set(issues)
+    return (not s.isdisjoint(HARD_NEGATIVE_ISSUES), not s.isdisjoint(POSITIVE_ISSUES),
+            s == {"Late delivery"})
+
+def override_sentiment_bulk(comments, issues, ratings):
+    """
+    override_sentiment over whole columns: the same decision ladder as
+    boolean masks, with issue flags computed once per distinct issue set.
+    """
+    import numpy as np
+    import pandas as pd
+
+    comments = pd.Series(comments, dtype=object).astype(str)
+    ratings = pd.Series(ratings, dtype=object).astype(str)
+    codes, uniques = pd.factorize(pd.Series([tuple(i) for i in issues], dtype=object))
+    flags = np.array([_issue_flags(u) for u in uniques], dtype=bool).reshape(-1, 3)[codes]
+    hard, pos_issue, only_late = flags[:, 0], flags[:, 1], flags[:, 2]
+
+    pos_words = comments.str.lower().str.contains(
+        "|".join(re.escape(w) for w in sorted(POSITIVE_WORDS)), regex=True).to_numpy()
+    rating = ratings.str.lower().to_numpy()
+    not_neg = rating != "negative"
+    upper = ratings.str.upper().to_numpy()
+
+    return np.select(
+        [(rating == "positive") & ~hard,
+         pos_words & ~hard,
+         only_late & not_neg,
+         hard,
+         pos_issue & not_neg],
+        ["POSITIVE", "POSITIVE", upper, "NEGATIVE", "POSITIVE"],
+        default=upper,
+    ).astype(object)
+
+# ========= Cascade =========
+# finalize_issues + override_sentiment only look at the rating, the rule hits and
+# two facts about the text, so rows that agree on those share one answer.
+_candidates = {}
+
+def candidate_labels(text: str, rating_type: str, rule_hits) -> tuple[str, ...]:
+    """
+    AI labels that would change this row's final sentiment if the model added
+    them. Empty when the rules have already decided it, e.g. a Negative rating
+    without positive words, or a hard negative such as "Damaged product (severe)".
+    """
+    t = text.lower()
+    key = (rating_type.lower(), tuple(sorted(rule_hits)),
+           any(pw in t for pw in POSITIVE_WORDS), bool(MISLEADING_RE.search(t)))
+    if key not in _candidates:
+        def sentiment(ai):
+            return override_sentiment(text, finalize_issues(text, rating_type, ai, rule_hits), rating_type)
+        base = sentiment([])
+        _candidates[key] = tuple(lbl for lbl in ISSUE_CATEGORIES if sentiment([lbl]) != base)
+    return _candidates[key]
+
+# ========= Process pool =========
+# Workers only run the rule engine and the sentiment ladder; the zero-shot
+# model stays in the parent process so it is loaded once, not once per worker.
+_pool_threshold = FUZZY_THRESHOLD
+
+def _pool_init(threshold):
+    global _pool_threshold
+    _pool_threshold = threshold
+    MATCHER.scan("")  # keyword tables are compiled at import; touch them before the first shard
+
+def _rules_shard(pairs) -> list[list[str]]:
+    return match_issues_bulk([c for c, _ in pairs], [r for _, r in pairs], _pool_threshold)
+
+def _finish_shard(rows) -> list[tuple[list[str], str]]:
+    issues = [finalize_issues(c, r, ai, rb) for c, r, ai, rb in rows]
+    sentiments = override_sentiment_bulk([c for c, *_ in rows], issues, [r for _, r, *_ in rows])
+    return list(zip(issues, sentiments))
+
+def _shards(items: list, n: int) -> list[list]:
+    size = max(1, -(-len(items) // n))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# ========= Analyzer =========
+class ReviewAnalyzer:
+    """
+    Classifies feedback rows. The zero-shot pipeline (and transformers itself)
+    is only loaded on the first fallback that actually needs the model, so
+    rule-only use (use_ai=False) never touches it.
+
+    backend="embed" swaps the NLI model for an EmbeddingClassifier: one
+    encoder pass per comment instead of one per label. Give it a cache
+    opened with embedder.cache_id, since stored scores are similarities.
+
+    cascade=True only asks the model about labels that could still change a
+    row's final sentiment (see cascade_labels); self.stats counts how often
+    each short-circuit fires.
+
+    dedup=<similarity> classifies one representative per group of exact or
+    near-duplicate comments (CommentDeduper) and copies its result to the group.
+    """
+
+    def __init__(self, model_id=MODEL_ID, min_conf=MIN_CONF, topk=TOPK, threshold=FUZZY_THRESHOLD,
+                 batch_size=AI_BATCH_SIZE, use_ai=True, cache: ClassificationCache | None = None,
+                 workers=1, backend="nli", embedder=None, cascade=False, dedup: float | None = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.model_id = model_id
+        self.min_conf = min_conf
+        self.topk = topk
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.use_ai = use_ai
+        self.cache = cache
+        self.workers = workers
+        self.backend = backend
+        self.cascade = cascade
+        self.dedup = dedup
+        self.stats = Counter()
+        self._deduper = None
+        self._embedder = embedder
+        self._zsc = None
+        self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Rule-engine worker pool, started on first use and reused across chunks."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_pool_init, initargs=(self.threshold,))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @property
+    def zsc(self):
+        if self._zsc is None:
+            from transformers import pipeline
+            self._zsc = pipeline("zero-shot-classification", model=self.model_id)
+        return self._zsc
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from EmbeddingClassifier import EmbeddingClassifier
+            self._embedder = EmbeddingClassifier(ISSUE_CATEGORIES, ISSUE_KEYWORDS, batch_size=self.batch_size)
+        return self._embedder
+
+    @property
+    def deduper(self):
+        if self._deduper is None:
+            from CommentDedup import CommentDeduper
+            self._deduper = CommentDeduper(self.dedup)
+        return self._deduper
+
+    @property
+    def version(self) -> str:
+        """Results cache version: taxonomy plus every setting that changes the output."""
+        settings = {"min_conf": self.min_conf, "topk": self.topk,
+                    "threshold": self.threshold, "use_ai": self.use_ai}
+        if self.backend == "embed":
+            settings.update(backend=self.embedder.cache_id, thresholds=self.embedder.thresholds)
+        if self.cascade:
+            settings["cascade"] = True
+        return taxonomy_version(TAXONOMY_VERSION, settings)
+
+    # zero-shot fallback (multi-label)
+    def ai_fallback(self, text: str) -> list[str]:
+        if not self.use_ai or not text.strip():
+            return []
+        if self.backend == "embed":
+            return self.ai_fallback_batch([text])[text]
+        res = self.zsc(text, ISSUE_CATEGORIES, multi_label=True)
+        return pick_ai_labels(res, self.min_conf, self.topk)
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        tok = getattr(self.zsc, "tokenizer", None)
+        if tok is None:
+            return [len(t.split()) for t in texts]
+        return [len(ids) for ids in tok(texts, add_special_tokens=False)["input_ids"]]
+
+    def zsc_batch(self, texts, labels=None, known: dict[str, dict] | None = None) -> dict[str, dict]:
+        """
+        Run the zero-shot model once per unique non-blank text.
+        Texts are fed shortest-first so each batch pads to a similar length.
+        Only labels not already scored for a text (in the cache or in `known`,
+        per-label scores from earlier in this run) are sent to the model.
+        Returns {text: pipeline-style result over `labels`, default ISSUE_CATEGORIES}.
+        """
+        cache = self.cache
+        labels = ISSUE_CATEGORIES if labels is None else list(labels)
+        unique = list(dict.fromkeys(t for t in texts if t.strip()))
+        if not unique:
+            return {}
+        scores = cache.get_scores(unique) if cache else {}
+        for t, s in (known or {}).items():
+            if t in scores:
+                scores[t] = {**scores[t], **s}
+            elif s:
+                scores[t] = dict(s)
+
+        # group texts by the labels they still need (normally all or none)
+        pending = {}
+        for t in unique:
+            need = tuple(lbl for lbl in labels if lbl not in scores.get(t, {}))
+            if need:
+                pending.setdefault(need, []).append(t)
+        if cache:
+            n_pending = sum(len(g) for g in pending.values())
+            cache.stats["scores_hit"] += len(unique) - n_pending
+            cache.stats["scores_miss"] += n_pending
+            METRICS.count("cache_hits", len(unique) - n_pending, table="scores")
+            METRICS.count("cache_misses", n_pending, table="scores")
+
+        fresh = {}
+        for need, group in pending.items():
+            self.stats["hypotheses"] += len(need) * len(group)
+            METRICS.count("ai_fallback_texts", len(group))
+            METRICS.count("ai_hypotheses", len(need) * len(group))
+            with METRICS.stage("model_inference", rows=len(group)):
+                lengths = self.token_lengths(group)
+                ordered = [t for _, t in sorted(zip(lengths, group), key=lambda x: x[0])]
+                results = self.zsc((t for t in ordered), list(need), multi_label=True, batch_size=self.batch_size)
+                for t, res in zip(ordered, results):
+                    fresh[t] = {**scores.get(t, {}), **dict(zip(res["labels"], res["scores"]))}
+        if cache and fresh:
+            cache.put_scores(fresh)
+        scores.update(fresh)
+
+        out = {}
+        for t in unique:
+            ranked = sorted(labels, key=lambda lbl: scores[t][lbl], reverse=True)
+            out[t] = {"sequence": t, "labels": ranked, "scores": [scores[t][lbl] for lbl in ranked]}
+        return out
+
+    def embed_batch(self, texts) -> dict[str, dict]:
+        """
+        zsc_batch for the embedding backend: one encoder pass per unique
+        non-blank text. Raw similarities are what gets cached, so
+        recalibrating thresholds never invalidates them.
+        """
+        cache = self.cache
+        unique = list(dict.fromkeys(t for t in texts if t.strip()))
+        if not unique:
+            return {}
+        sims = cache.get_scores(unique) if cache else {}
+        todo = [t for t in unique if any(lbl not in sims.get(t, {}) for lbl in ISSUE_CATEGORIES)]
+        if cache:
+            cache.stats["scores_hit"] += len(unique) - len(todo)
+            cache.stats["scores_miss"] += len(todo)
+            METRICS.count("cache_hits", len(unique) - len(todo), table="scores")
+            METRICS.count("cache_misses", len(todo), table="scores")
+        if todo:
+            METRICS.count("ai_fallback_texts", len(todo))
+            with METRICS.stage("model_inference", rows=len(todo)):
+                fresh = self.embedder.similarities(todo)
+            if cache:
+                cache.put_scores(fresh)
+            sims.update(fresh)
+        return {t: self.embedder.result(t, sims[t], self.min_conf) for t in unique}
+
+    def ai_fallback_batch(self, texts) -> dict[str, list[str]]:
+        """Batched ai_fallback: {text: labels} for every unique text."""
+        if not self.use_ai:
+            return {}
+        results = self.embed_batch(texts) if self.backend == "embed" else self.zsc_batch(texts)
+        return {t: pick_ai_labels(res, self.min_conf, self.topk) for t, res in results.items()}
+
+    def _ai_scores(self, texts, labels=None, known=None) -> dict[str, dict]:
+        if self.backend == "embed":
+            return self.embed_batch(texts)  # every label comes out of the same pass
+        return self.zsc_batch(texts, labels, known)
+
+    def cascade_labels(self, todo: list[tuple[str, str]], rule_hits) -> list[list[str]]:
+        """
+        AI labels per (comment, rating) row, asking the model as little as possible:
+        - rows with no candidate_labels are decided by the rules: no model call
+        - otherwise only the candidates are scored; if none reaches min_conf,
+          none can be picked whatever the other labels score
+        - a text with a candidate over min_conf gets every label scored, so
+          topk still picks from the full ranking
+        Final sentiments match a full run. Labels that could only be added on
+        the side (e.g. "Great value" on a Negative review) are not looked for.
+        """
+        if not self.use_ai:
+            return [[] for _ in todo]
+        cands = [candidate_labels(c, r, rb) for (c, r), rb in zip(todo, rule_hits)]
+
+        # stage 1: each text's candidates, texts grouped by candidate set
+        wanted = {}
+        for (c, _), cand in zip(todo, cands):
+            if cand:
+                wanted.setdefault(c, set()).update(cand)
+        self.stats["cascade_hypotheses_full"] += len({c for c, _ in todo}) * len(ISSUE_CATEGORIES)
+        groups = {}
+        for c, labels in wanted.items():
+            groups.setdefault(tuple(lbl for lbl in ISSUE_CATEGORIES if lbl in labels), []).append(c)
+        scores = {}
+        for labels, group in groups.items():
+            for t, res in self._ai_scores(group, labels, scores).items():
+                scores[t] = {**scores.get(t, {}), **dict(zip(res["labels"], res["scores"]))}
 
-df[["issues", "final_sentiment"]] = df.apply(apply_row, axis=1)
+        # stage 2: the rest of the labels, only where a candidate could be picked
+        full = {c for (c, _), cand in zip(todo, cands)
+                if any(scores.get(c, {}).get(lbl, 0.0) >= self.min_conf for lbl in cand)}
+        missing = [t for t in full if len(scores[t]) < len(ISSUE_CATEGORIES)]
+        for t, res in self._ai_scores(missing, None, scores).items():
+            scores[t] = {**scores[t], **dict(zip(res["labels"], res["scores"]))}
+        picked = {}
+        for t in full:
+            ranked = sorted(ISSUE_CATEGORIES, key=lambda lbl: scores[t][lbl], reverse=True)
+            picked[t] = pick_ai_labels({"labels": ranked, "scores": [scores[t][lbl] for lbl in ranked]},
+                                       self.min_conf, self.topk)
+
+        out = []
+        for (c, _), cand in zip(todo, cands):
+            if c in picked:
+                self.stats["cascade_full"] += 1
+            elif cand:
+                self.stats["cascade_below_min_conf"] += 1
+            else:
+                self.stats["cascade_rules_decided"] += 1
+            out.append(picked.get(c, []))
+        return out
+
+    def classify(self, df):
+        """
+        Add `issue_mask` (bit i = ISSUE_LABELS[i]) and a categorical
+        `final_sentiment` to a prepared feedback frame.
+        """
+        import numpy as np
+        import pandas as pd
+
+        cache = self.cache
+        METRICS.count("rows_classified", len(df))
+        with METRICS.stage("normalize", rows=len(df)):
+            df = df.copy()
+            comments = df["comment"].fillna("").astype(str).str.strip()
+            ratings = df["rating_type"].fillna("").astype(str).str.strip()
+            if self.dedup is not None:
+                with METRICS.stage("dedup", rows=len(df)):
+                    comments = comments.map(self.deduper.representatives(comments))
+
+            # classify each distinct (comment, rating) once and fan the result out by code
+            codes, _ = pd.factorize(comments + "\x1f" + ratings)
+            _, first = np.unique(codes, return_index=True)
+            u_comments = comments.to_numpy()[first]
+            u_ratings = ratings.to_numpy()[first]
+            blank = u_comments == ""
+            keys = [(c, r) for c, r in zip(u_comments[~blank], u_ratings[~blank])]
+
+        classified = {}
+        if cache:
+            with METRICS.stage("cache_lookup", rows=len(keys)):
+                classified = cache.get_results(keys, self.version)
+        todo = [k for k in keys if k not in classified]
+        self.stats["classified"] += len(todo)
+        METRICS.count("pairs_classified", len(todo))
+        if cache:
+            METRICS.count("cache_hits", len(keys) - len(todo), table="results")
+            METRICS.count("cache_misses", len(todo), table="results")
+
+        if todo:
+            if self.workers > 1:
+                new_results = self._classify_parallel(todo)
+            else:
+                new_results = self._classify_serial(todo)
+            classified.update(new_results)
+            if METRICS.enabled:
+                METRICS.count_many("rule_hits", "issue", Counter(lbl for rb, _, _ in new_results.values() for lbl in rb))
+            if cache:
+                with METRICS.stage("cache_write", rows=len(new_results)):
+                    cache.put_results(new_results, self.version)
+
+        with METRICS.stage("fan_out", rows=len(df)):
+            u_masks = np.zeros(len(first), dtype=ISSUE_MASK_DTYPE)
+            u_sent = np.empty(len(first), dtype=object)
+            for i in np.flatnonzero(blank):
+                u_sent[i] = u_ratings[i].upper() or "NEUTRAL"
+            for i in np.flatnonzero(~blank):
+                _, issues, u_sent[i] = classified[(u_comments[i], u_ratings[i])]
+                u_masks[i] = encode_issues(issues)
+
+            sentiments = pd.Categorical(u_sent, categories=SENTIMENTS + sorted(set(u_sent) - set(SENTIMENTS)))
+            df["issue_mask"] = u_masks[codes]
+            df["final_sentiment"] = sentiments[codes]
+        return df
+
+    def _classify_serial(self, todo: list[tuple[str, str]]) -> dict:
+        t_comments, t_ratings = zip(*todo)
+        with METRICS.stage("rules", rows=len(todo)):
+            rule_hits = match_issues_bulk(t_comments, t_ratings, self.threshold)
+        with METRICS.stage("ai_fallback", rows=len(todo)):
+            if self.cascade:
+                ai_labels = self.cascade_labels(todo, rule_hits)
+            else:
+                # every non-blank comment not already cached goes through the fallback, so score them all up front in batches
+                ai_results = self.ai_fallback_batch({c for c, _ in todo})
+                ai_labels = [ai_results.get(c, []) for c in t_comments]
+        with METRICS.stage("finalize", rows=len(todo)):
+            issues = [finalize_issues(c, r, ai, rb)
+                      for c, r, ai, rb in zip(t_comments, t_ratings, ai_labels, rule_hits)]
+            sentiments = override_sentiment_bulk(t_comments, issues, t_ratings)
+        return {k: (rb, iss, sent) for k, rb, iss, sent in zip(todo, rule_hits, issues, sentiments)}
+
+    def _classify_parallel(self, todo: list[tuple[str, str]]) -> dict:
+        # shard the rule stage across the pool, and run the model here while the workers match
+        # (then "rules" only times the wait for the workers once the model is done)
+        shards = _shards(todo, self.workers * 4)
+        rule_jobs = self.pool.map(_rules_shard, shards)
+        if self.cascade:
+            # the cascade needs the rule hits before it can pick labels
+            with METRICS.stage("rules", rows=len(todo)):
+                rule_hits = [rb for part in rule_jobs for rb in part]
+            with METRICS.stage("ai_fallback", rows=len(todo)):
+                ai_labels = self.cascade_labels(todo, rule_hits)
+        else:
+            with METRICS.stage("ai_fallback", rows=len(todo)):
+                ai_results = self.ai_fallback_batch({c for c, _ in todo})
+            with METRICS.stage("rules", rows=len(todo)):
+                rule_hits = [rb for part in rule_jobs for rb in part]
+            ai_labels = [ai_results.get(c, []) for c, _ in todo]
+
+        with METRICS.stage("finalize", rows=len(todo)):
+            rows = [(c, r, ai, rb) for (c, r), ai, rb in zip(todo, ai_labels, rule_hits)]
+            finished = [out for part in self.pool.map(_finish_shard, _shards(rows, self.workers * 4)) for out in part]
+        return {k: (rb, iss, sent) for k, rb, (iss, sent) in zip(todo, rule_hits, finished)}
+
+_default = None
+
+def default_analyzer() -> ReviewAnalyzer:
+    """Shared analyzer for the module-level helpers; the model still loads lazily."""
+    global _default
+    if _default is None:
+        _default = ReviewAnalyzer()
+    return _default
+
+def ai_fallback(text: str, min_conf=MIN_CONF, topk=TOPK) -> list[str]:
+    if not text.strip():
+        return []
+    res = default_analyzer().zsc(text, ISSUE_CATEGORIES, multi_label=True)
+    return pick_ai_labels(res, min_conf, topk)
+
+# ========= Load =========
+def load_feedback(path=CSV_PATH):
+    import pandas as pd
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(os.path.abspath(path))
+
+    with METRICS.stage("load") as st:
+        df = pd.read_csv(path)
+        check_columns(df)
+        df = prepare_feedback(df)
+        st.rows = len(df)
+    METRICS.count("rows_loaded", len(df))
+    return df
+
+def check_columns(df):
+    req = {"comment","rating_type"}
+    if not req.issubset(df.columns):
+        raise ValueError(f"CSV must include {req}")
+
+def prepare_feedback(df):
+    """Normalize comments and drop one-word filler feedback."""
+    df = df.copy()
+    df["comment"] = df["comment"].fillna("").astype(str).str.translate(QUOTE_TABLE)
+    return df[~df["comment"].str.strip().str.lower().isin(STOP_COMMENTS)].copy()
 
 # ========= Output =========
-summary = (
-    df.explode("issues")
-      .groupby(["issues","final_sentiment"])
-      .size()
-      .reset_index(name="count")
-      .sort_values("count", ascending=False)
-)
-
-print("📊 Issue Sentiment Summary:")
-print(summary)
-
-print("\n🚨 All NEGATIVE Reviews:")
-neg = df[df["final_sentiment"]=="NEGATIVE"].copy()
-neg["issues"] = neg["issues"].apply(lambda x: ", ".join(x) if isinstance(x, list) else str(x))
-print(neg[["comment","issues"]].to_string(index=False))
-
-out_path = os.path.abspath("negative_reviews.csv")
-neg.to_csv(out_path, index=False)
-print(f"\n💾 Negative reviews exported to {out_path}")
+def issue_lists(masks) -> list[list[str]]:
+    """Decode an issue_mask column back to label lists (for display)."""
+    return [list(decode_issues(m)) for m in masks]
+
+def issue_strings(masks) -> list[str]:
+    """Decode an issue_mask column to "a, b" strings, joining each distinct mask once."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(masks))
+    joined = [", ".join(decode_issues(m)) for m in uniques]
+    return [joined[c] for c in codes]
+
+def count_issues(df, counts: Counter | None = None) -> Counter:
+    """
+    Running (issue, final_sentiment) tally straight from the bitmasks: rows are
+    collapsed to distinct (mask, sentiment) pairs, then each label's bit is
+    tallied with np.bincount over those pairs.
+    """
+    import numpy as np
+    import pandas as pd
+
+    counts = Counter() if counts is None else counts
+    if not len(df):
+        return counts
+    with METRICS.stage("summary", rows=len(df)):
+        sentiments = pd.Categorical(df["final_sentiment"])
+        n_sent = len(sentiments.categories)
+        pairs = df["issue_mask"].to_numpy().astype(np.uint64) * np.uint64(n_sent) + sentiments.codes.astype(np.uint64)
+        keys, n = np.unique(pairs, return_counts=True)
+        masks, sent = keys // np.uint64(n_sent), (keys % np.uint64(n_sent)).astype(np.intp)
+        for i, lbl in enumerate(ISSUE_LABELS):
+            has = (masks >> np.uint64(i)) & np.uint64(1) == 1
+            for code, total in enumerate(np.bincount(sent[has], weights=n[has], minlength=n_sent)):
+                if total:
+                    counts[(lbl, sentiments.categories[code])] += int(total)
+    return counts
+
+def summarize(df):
+    return summary_from_counts(count_issues(df))
+
+def summary_from_counts(counts: Counter):
+    import pandas as pd
+
+    rows = sorted((issue, sentiment, n) for (issue, sentiment), n in counts.items())
+    return (pd.DataFrame(rows, columns=["issues","final_sentiment","count"])
+              .sort_values("count", ascending=False, kind="stable")
+              .reset_index(drop=True))
+
+def negative_reviews(df):
+    """NEGATIVE rows with the mask decoded to an `issues` string in the same column position."""
+    neg = df[df["final_sentiment"]=="NEGATIVE"].copy()
+    loc = neg.columns.get_loc("issue_mask")
+    neg.insert(loc, "issues", issue_strings(neg.pop("issue_mask")))
+    return neg
+
+# ========= Streaming =========
+def stream_feedback(path, analyzer: ReviewAnalyzer, out_path=OUT_PATH, chunksize=CHUNK_SIZE,
+                    sink=None) -> tuple[Counter, int, int]:
+    """
+    Classify a CSV of any size chunk by chunk. NEGATIVE rows are appended to
+    out_path as they are found and the summary is kept as a running Counter,
+    so memory is bounded by the chunk size, not the file size. `sink`, if
+    given, is called with every classified chunk (e.g. FeedbackStore.append).
+    Returns (counts, rows classified, negative rows written).
+    """
+    import pandas as pd
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(os.path.abspath(path))
+
+    counts = Counter()
+    n_rows = n_neg = 0
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        chunks = iter(reader)
+        i = 0
+        while True:
+            # reading the chunk counts towards "load", like load_feedback's read_csv
+            with METRICS.stage("load") as st:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    check_columns(chunk)
+                    chunk = prepare_feedback(chunk)
+                    st.rows = len(chunk)
+            if chunk is None:
+                break
+            METRICS.count("rows_loaded", len(chunk))
+            df = analyzer.classify(chunk)
+            count_issues(df, counts)
+            if sink:
+                sink(df)
+            with METRICS.stage("write_output", rows=len(df)):
+                neg = negative_reviews(df)
+                # first chunk (re)creates the file with a header, the rest append
+                neg.to_csv(out_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            n_rows += len(df)
+            n_neg += len(neg)
+            i += 1
+            print(f"📦 Classified {n_rows} rows, {n_neg} negative so far...")
+    return counts, n_rows, n_neg
+
+# ========= Backend comparison =========
+def compare_backends(df, nli: ReviewAnalyzer, embed: ReviewAnalyzer, calibrate_path=None) -> dict:
+    """
+    Agreement between the two backends' AI labels on the frame's distinct comments.
+    With calibrate_path, the embedding thresholds are first fitted so each label
+    fires where NLI scores it >= min_conf, and saved there.
+    """
+    import numpy as np
+    from EmbeddingClassifier import agreement_report, calibrate_thresholds, save_thresholds
+
+    texts = list(dict.fromkeys(c for c in df["comment"].fillna("").astype(str).str.strip() if c))
+    reference = nli.zsc_batch(texts)
+    if calibrate_path:
+        embedder = embed.embedder
+        target = np.array([[dict(zip(reference[t]["labels"], reference[t]["scores"]))[lbl] >= nli.min_conf
+                            for lbl in embedder.categories] for t in texts]).reshape(len(texts), -1)
+        embedder.thresholds.update(calibrate_thresholds(embedder.similarity_matrix(texts), target,
+                                                        embedder.categories))
+        save_thresholds(calibrate_path, embedder.model_id, embedder.thresholds)
+        print(f"🎯 Calibrated {len(embedder.categories)} label thresholds on {len(texts)} comments → {calibrate_path}")
+
+    nli_labels = {t: pick_ai_labels(res, nli.min_conf, nli.topk) for t, res in reference.items()}
+    return agreement_report(nli_labels, embed.ai_fallback_batch(texts), ISSUE_CATEGORIES)
+
+# ========= CLI =========
+def add_analyzer_args(ap: argparse.ArgumentParser):
+    """Options that configure the ReviewAnalyzer; shared with AnalysisService.py."""
+    ap.add_argument("--threshold", type=float, default=FUZZY_THRESHOLD, help="fuzzy keyword match threshold (0-100)")
+    ap.add_argument("--min-conf", type=float, default=MIN_CONF, help="zero-shot score needed to add a label")
+    ap.add_argument("--topk", type=int, default=TOPK, help="max zero-shot labels per comment")
+    ap.add_argument("--batch-size", type=int, default=AI_BATCH_SIZE, help="zero-shot inference batch size")
+    ap.add_argument("--model", default=MODEL_ID, help="zero-shot model id")
+    ap.add_argument("--no-ai", action="store_true", help="rule-based only; never load the model")
+    ap.add_argument("--cache", default=CACHE_PATH, help="classification cache file")
+    ap.add_argument("--no-cache", action="store_true", help="don't read or write the cache")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="processes for the rule stage (the model still loads once, in the main process)")
+    ap.add_argument("--backend", choices=BACKENDS, default="nli",
+                    help="AI fallback: NLI zero-shot (--model) or sentence-embedding similarity (--embed-model)")
+    ap.add_argument("--embed-model", default=None, help="sentence-embedding model id for --backend embed")
+    ap.add_argument("--thresholds", default=None, help="per-label similarity thresholds file for --backend embed")
+    ap.add_argument("--cascade", action="store_true",
+                    help="only ask the model about labels that could change the final sentiment")
+    ap.add_argument("--dedup", type=float, nargs="?", const=DEDUP_THRESHOLD, default=None, metavar="SIMILARITY",
+                    help="classify one comment per group of exact / near duplicates "
+                         f"(shingle Jaccard >= SIMILARITY, default {DEDUP_THRESHOLD}; 1 = exact after normalizing)")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Tag eBay feedback with issues and a final sentiment.")
+    ap.add_argument("input", nargs="?", default=CSV_PATH, help="feedback CSV with comment,rating_type columns")
+    ap.add_argument("-o", "--output", default=OUT_PATH, help="where to write the NEGATIVE reviews")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help=f"stream the input in chunks of this many rows (e.g. {CHUNK_SIZE}) instead of loading it whole")
+    add_analyzer_args(ap)
+    add_metrics_args(ap)
+    ap.add_argument("--store", default=None, metavar="DIR",
+                    help="also append the classified rows to this Parquet store (see FeedbackStore.py)")
+    ap.add_argument("--seller", default=None, help="seller the input belongs to (default: the input file's name)")
+    ap.add_argument("--scrape-date", default=None, help="YYYY-MM-DD the input was scraped (default: today)")
+    ap.add_argument("--compare", action="store_true",
+                    help="report how well the embedding backend agrees with NLI on this input, then exit")
+    ap.add_argument("--calibrate", action="store_true",
+                    help="with --compare: fit the embedding thresholds to NLI first and save them")
+    return ap.parse_args(argv)
+
+def make_embedder(args):
+    from EmbeddingClassifier import EMBED_MODEL_ID, THRESHOLDS_PATH, EmbeddingClassifier, load_thresholds
+
+    model_id = args.embed_model or EMBED_MODEL_ID
+    args.thresholds = args.thresholds or THRESHOLDS_PATH
+    return EmbeddingClassifier(ISSUE_CATEGORIES, ISSUE_KEYWORDS, model_id, batch_size=args.batch_size,
+                               thresholds=load_thresholds(args.thresholds, model_id))
+
+def build_analyzer(args) -> ReviewAnalyzer:
+    """ReviewAnalyzer (and its cache, if enabled) from add_analyzer_args options."""
+    embedder = make_embedder(args) if args.backend == "embed" else None
+    cache = None
+    if args.cache and not args.no_cache:
+        cache = ClassificationCache(args.cache, embedder.cache_id if embedder else args.model, CACHE_MAX_ENTRIES)
+    return ReviewAnalyzer(args.model, args.min_conf, args.topk, args.threshold,
+                          args.batch_size, use_ai=not args.no_ai, cache=cache, workers=args.workers,
+                          backend=args.backend, embedder=embedder, cascade=args.cascade, dedup=args.dedup)
+
+def run_compare(args):
+    from EmbeddingClassifier import format_agreement
+
+    cache = None
+    if args.cache and not args.no_cache:
+        cache = ClassificationCache(args.cache, args.model, CACHE_MAX_ENTRIES)
+    nli = ReviewAnalyzer(args.model, args.min_conf, args.topk, args.threshold, args.batch_size, cache=cache)
+    embed = ReviewAnalyzer(args.model, args.min_conf, args.topk, args.threshold, args.batch_size,
+                           backend="embed", embedder=make_embedder(args))
+    report = compare_backends(load_feedback(args.input), nli, embed,
+                              args.thresholds if args.calibrate else None)
+    if cache:
+        cache.close()
+    print("🤝 Embedding vs NLI agreement:")
+    print(format_agreement(report))
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        return run_compare(args)
+
+    start_from_args(args)
+    analyzer = build_analyzer(args)
+    cache = analyzer.cache
+
+    store = sink = None
+    stored = Counter()
+    if args.store:
+        from FeedbackStore import FeedbackStore
+
+        store = FeedbackStore(args.store, ISSUE_LABELS)
+        seller = args.seller or os.path.splitext(os.path.basename(args.input))[0]
+
+        def store_rows(df):
+            stored["new"] += store.append(df, seller, args.scrape_date)
+            stored["rows"] += len(df)
+        sink = store_rows
+
+    out_path = os.path.abspath(args.output)
+    if args.chunksize:
+        counts, n_rows, n_neg = stream_feedback(args.input, analyzer, out_path, args.chunksize, sink)
+        summary, df = summary_from_counts(counts), None
+    else:
+        df = analyzer.classify(load_feedback(args.input))
+        summary = summarize(df)
+        if sink:
+            sink(df)
+    analyzer.close()
+    if store:
+        store.close()
+        print(f"🗄️ Stored {stored['new']} new rows for {seller} in {args.store} "
+              f"({stored['rows'] - stored['new']} were already there)")
+
+    if args.dedup is not None:
+        from CommentDedup import format_collapse
+        print(f"🧬 Dedup: {format_collapse(analyzer.deduper.stats)}")
+        print(f"🧬 {analyzer.stats['classified']} (comment, rating) pairs went through the rules"
+              + (f", {analyzer.stats['hypotheses']} label hypotheses to the model" if args.backend == "nli" else ""))
+
+    if args.cascade and not args.no_ai:
+        st = analyzer.stats
+        print(f"⚡ Cascade: {st['cascade_rules_decided']} rows decided by rules, "
+              f"{st['cascade_below_min_conf']} settled on candidate labels, {st['cascade_full']} scored in full")
+        if args.backend == "nli":
+            print(f"⚡ {st['hypotheses']} label hypotheses sent to the model "
+                  f"(without the cascade: {st['cascade_hypotheses_full']})")
+
+    if cache:
+        cache.close()
+        print(f"🗃️ Cache: {cache.stats['results_hit']} results hit / {cache.stats['results_miss']} miss, "
+              f"{cache.stats['scores_hit']} AI scores hit / {cache.stats['scores_miss']} miss")
+
+    print("📊 Issue Sentiment Summary:")
+    print(summary)
+
+    if df is None:
+        print(f"\n🚨 {n_neg} NEGATIVE reviews out of {n_rows}")
+    else:
+        print("\n🚨 All NEGATIVE Reviews:")
+        with METRICS.stage("write_output", rows=len(df)):
+            neg = negative_reviews(df)
+            neg.to_csv(out_path, index=False)
+        print(neg[["comment","issues"]].to_string(index=False))
+        n_neg = len(neg)
+    print(f"\n💾 Negative reviews exported to {out_path}")
+    METRICS.count("negative_rows", n_neg)
+    finish_from_args(args, input=os.path.abspath(args.input), backend=args.backend,
+                     analyzer_stats=dict(analyzer.stats), cache_stats=dict(cache.stats) if cache else None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Long-running analysis service: keeps the compiled rule tables and the
+zero-shot model resident and answers per-review requests over HTTP.
+
+    python AnalysisService.py --port 8000   (plus any AIAnalysis.py analyzer option)
+
+    POST /analyze  {"comment": "...", "rating_type": "Positive"}
+                   or {"reviews": [{"comment": "...", "rating_type": "..."}, ...]}
+    GET  /stats    queue depth, batch sizes, latency percentiles
+    GET  /health
+
+Concurrent requests are gathered into micro-batches: the first queued review
+opens a --max-wait-ms window, and the batch goes to the analyzer when the
+window closes or --max-batch reviews are waiting.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import AIAnalysis
+
+HOST = "127.0.0.1"
+PORT = 8000
+MAX_BATCH = 32
+MAX_WAIT_MS = 10
+EVICT_EVERY = 500  # batches between cache trims down to CACHE_MAX_ENTRIES
+MAX_REVIEWS_PER_REQUEST = 10_000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+REQUEST_TIMEOUT = 300  # seconds a request waits for its results
+
+
+def _percentiles(values, points=(50, 90, 99)) -> dict:
+    if not values:
+        return {f"p{p}": None for p in points} | {"max": None}
+    ordered = sorted(values)
+    out = {f"p{p}": round(ordered[min(len(ordered) - 1, len(ordered) * p // 100)], 2) for p in points}
+    out["max"] = round(ordered[-1], 2)
+    return out
+
+
+class ServiceStats:
+    """Counters plus recent latencies (ms); all updates go through one lock."""
+
+    def __init__(self, window=2048):
+        self.started = time.time()
+        self.counts = Counter()
+        self.batch_sizes = Counter()
+        self.latency = deque(maxlen=window)     # per review: queued -> result
+        self.batch_time = deque(maxlen=window)  # per batch: analyzer time
+        self._lock = threading.Lock()
+
+    def record_batch(self, size: int, seconds: float, latencies: list[float], failed=False):
+        with self._lock:
+            self.counts["batches"] += 1
+            self.counts["reviews"] += size
+            self.counts["errors"] += size if failed else 0
+            self.batch_sizes[size] += 1
+            self.batch_time.append(seconds * 1000)
+            self.latency.extend(latencies)
+
+    def record_request(self):
+        with self._lock:
+            self.counts["requests"] += 1
+
+    def snapshot(self, queue_depth: int, in_flight: int) -> dict:
+        with self._lock:
+            batches = self.counts["batches"]
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "queue_depth": queue_depth,
+                "in_flight": in_flight,
+                "requests": self.counts["requests"],
+                "reviews": self.counts["reviews"],
+                "errors": self.counts["errors"],
+                "batches": batches,
+                "mean_batch_size": round(self.counts["reviews"] / batches, 2) if batches else None,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "latency_ms": _percentiles(list(self.latency)),
+                "batch_ms": _percentiles(list(self.batch_time)),
+            }
+
+
+class MicroBatcher:
+    """
+    Owns the analyzer on a single background thread (the model, the rule
+    tables and the SQLite cache all stay on it) and feeds it micro-batches
+    gathered from the queue. The cache is trimmed to its size cap every
+    `evict_every` batches (0: only on shutdown).
+    """
+
+    def __init__(self, make_analyzer, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, evict_every=EVICT_EVERY):
+        self.make_analyzer = make_analyzer
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.evict_every = evict_every
+        self.queue = queue.Queue()
+        self.stats = ServiceStats()
+        self.in_flight = 0
+        self.ready = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="analyzer", daemon=True)
+
+    def start(self):
+        """Load and warm the analyzer; returns once it can take requests."""
+        self._thread.start()
+        self.ready.wait()
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        self.queue.put(None)
+        self._thread.join()
+
+    def submit(self, reviews: list[tuple[str, str]]) -> list[Future]:
+        queued = time.perf_counter()
+        futures = []
+        for comment, rating in reviews:
+            fut = Future()
+            self.queue.put((comment, rating, fut, queued))
+            futures.append(fut)
+        return futures
+
+    def snapshot(self) -> dict:
+        return self.stats.snapshot(self.queue.qsize(), self.in_flight)
+
+    # ---- analyzer thread ----
+    def _run(self):
+        try:
+            analyzer = self.make_analyzer()
+            warm_up(analyzer)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        stopping = False
+        batches = 0
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                wait = deadline - time.perf_counter()
+                try:
+                    item = self.queue.get(timeout=wait) if wait > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process(analyzer, batch)
+            batches += 1
+            if analyzer.cache and self.evict_every and batches % self.evict_every == 0:
+                analyzer.cache.evict()
+
+        analyzer.close()
+        if analyzer.cache:
+            analyzer.cache.close()
+
+    def _process(self, analyzer, batch):
+        self.in_flight = len(batch)
+        start = time.perf_counter()
+        try:
+            results = analyze_reviews(analyzer, [(c, r) for c, r, *_ in batch])
+        except Exception as e:
+            for *_, fut, _ in batch:
+                fut.set_exception(e)
+            done = time.perf_counter()
+            self.stats.record_batch(len(batch), done - start, [(done - q) * 1000 for *_, q in batch], failed=True)
+        else:
+            done = time.perf_counter()
+            for (*_, fut, _), res in zip(batch, results):
+                fut.set_result(res)
+            self.stats.record_batch(len(batch), done - start, [(done - q) * 1000 for *_, q in batch])
+        finally:
+            self.in_flight = 0
+
+
+def analyze_reviews(analyzer, reviews: list[tuple[str, str]]) -> list[dict]:
+    """Classify (comment, rating_type) pairs; one result dict per pair, in order."""
+    import pandas as pd
+
+    comments = [AIAnalysis.normalize_quotes(c) for c, _ in reviews]
+    df = pd.DataFrame({
+        # one-word filler ("ok") is dropped by the batch CLI (prepare_feedback); answer it like a blank comment
+        "comment": ["" if c.strip().lower() in AIAnalysis.STOP_COMMENTS else c for c in comments],
+        "rating_type": [r for _, r in reviews],
+    })
+    out = analyzer.classify(df)
+    return [
+        {"comment": c, "rating_type": r, "issues": issues, "final_sentiment": str(sent)}
+        for (c, r), issues, sent in zip(reviews, AIAnalysis.issue_lists(out["issue_mask"]), out["final_sentiment"])
+    ]
+
+
+def warm_up(analyzer):
+    """Load everything the first real request would otherwise pay for."""
+    AIAnalysis.MATCHER.scan("")
+    if analyzer.use_ai:
+        if analyzer.backend == "embed":
+            analyzer.embedder.label_matrix
+        else:
+            analyzer.zsc
+    analyze_reviews(analyzer, [("warm up", "Neutral")])
+
+
+# ========= HTTP =========
+def parse_reviews(payload) -> list[tuple[str, str]]:
+    items = payload.get("reviews") if isinstance(payload, dict) and "reviews" in payload else [payload]
+    if not isinstance(items, list) or not items:
+        raise ValueError('expected {"comment": ..., "rating_type": ...} or {"reviews": [...]}')
+    if len(items) > MAX_REVIEWS_PER_REQUEST:
+        raise ValueError(f"at most {MAX_REVIEWS_PER_REQUEST} reviews per request")
+    reviews = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("comment"), str):
+            raise ValueError("every review needs a string 'comment'")
+        reviews.append((item["comment"].strip(), str(item.get("rating_type") or "").strip()))
+    return reviews
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "ReviewAnalysis/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive; every response carries Content-Length
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, self.server.batcher.snapshot())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True  # the body's extent is unknown, so the connection can't be reused
+            return self._send(400, {"error": "invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the unread body would be parsed as the next request
+            return self._send(413, {"error": "request body too large"})
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+            reviews = parse_reviews(payload)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+
+        batcher = self.server.batcher
+        batcher.stats.record_request()
+        futures = batcher.submit(reviews)
+        deadline = time.monotonic() + REQUEST_TIMEOUT
+        try:
+            results = [f.result(timeout=max(0.0, deadline - time.monotonic())) for f in futures]
+        except TimeoutError:
+            return self._send(504, {"error": "analysis timed out"})
+        except Exception as e:
+            return self._send(500, {"error": f"analysis failed: {e}"})
+        single = not (isinstance(payload, dict) and "reviews" in payload)
+        self._send(200, results[0] if single else {"results": results})
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate at this request rate; see /stats
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # bursts of concurrent clients; the default of 5 resets connections
+
+    def __init__(self, address, batcher: MicroBatcher):
+        super().__init__(address, ServiceHandler)
+        self.batcher = batcher
+
+
+# ========= CLI =========
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Serve review analysis over HTTP with a warm model.")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--max-batch", type=int, default=MAX_BATCH, help="reviews per micro-batch")
+    ap.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                    help="how long the first queued review waits for others to join its batch")
+    ap.add_argument("--evict-every", type=int, default=EVICT_EVERY,
+                    help="trim the cache to its size cap every N batches (0: only on shutdown)")
+    AIAnalysis.add_analyzer_args(ap)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    batcher = MicroBatcher(lambda: AIAnalysis.build_analyzer(args), args.max_batch, args.max_wait_ms,
+                           args.evict_every)
+    print("🔥 Loading analyzer...")
+    start = time.perf_counter()
+    batcher.start()
+    print(f"✅ Warm in {time.perf_counter() - start:.1f}s")
+
+    server = AnalysisServer((args.host, args.port), batcher)
+    print(f"🚀 Listening on http://{args.host}:{server.server_address[1]} (POST /analyze, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Offline benchmark suite: synthetic feedback (SyntheticFeedback.py), a stub
+zero-shot model with realistic latency, and timings saved as JSON so runs
+can be compared between commits.
+
+    python Benchmark.py                              # every benchmark at 1k, 100k and 1M rows
+    python Benchmark.py --sizes 1000 100000 --only rules e2e_rules
+    python Benchmark.py --compare bench_results/<old commit>.json
+    python Benchmark.py --sizes 100000 --duplicates 0.8   # a more repetitive feedback mix
+
+Nothing here touches the network or downloads a model.
+"""
+import argparse
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from itertools import cycle
+
+import AIAnalysis
+from SyntheticFeedback import add_mix_args, mix_from_args, write_feedback
+
+SIZES = [1_000, 100_000, 1_000_000]
+RESULTS_DIR = "bench_results"
+REPEAT = 3  # best of N for sizes up to 100k; bigger sizes run once
+
+
+# ========= Stub model =========
+class StubZeroShot:
+    """
+    Stands in for the transformers zero-shot pipeline (same call shapes).
+    Scores are a deterministic hash, pushed above MIN_CONF when the text
+    contains one of the label's keywords, so roughly as many labels fire as
+    with the real model. Each batch sleeps like the model would: a fixed
+    cost plus a per-hypothesis cost that grows with the padded length.
+    """
+
+    def __init__(self, keywords=None, batch_ms=4.0, pair_ms=0.5):
+        self.keywords = keywords or AIAnalysis.ISSUE_KEYWORDS
+        self.batch_ms = batch_ms
+        self.pair_ms = pair_ms
+        self.batches = 0
+        self.pairs = 0
+
+    def score(self, text: str, label: str) -> float:
+        h = int.from_bytes(hashlib.blake2b(f"{text}\x1f{label}".encode("utf-8"), digest_size=4).digest(), "big")
+        u = h / 0xFFFFFFFF
+        t = text.lower()
+        if any(kw in t for kw in self.keywords.get(label, ())):
+            return 0.6 + 0.4 * u
+        return 0.6 * u ** 4  # most hypotheses are clearly not entailed
+
+    def result(self, text: str, labels) -> dict:
+        scored = sorted(((self.score(text, lbl), lbl) for lbl in labels), reverse=True)
+        return {"sequence": text, "labels": [lbl for _, lbl in scored], "scores": [s for s, _ in scored]}
+
+    def _wait(self, batch, labels):
+        tokens = max(len(t.split()) for t in batch) + 8  # padded to the longest text, plus the hypothesis
+        self.batches += 1
+        self.pairs += len(batch) * len(labels)
+        ms = self.batch_ms + self.pair_ms * len(batch) * len(labels) * tokens / 16
+        time.sleep(ms / 1000)
+
+    def _batches(self, texts, labels, batch_size):
+        batch = []
+        for t in texts:
+            batch.append(t)
+            if len(batch) == batch_size:
+                self._wait(batch, labels)
+                yield from (self.result(x, labels) for x in batch)
+                batch = []
+        if batch:
+            self._wait(batch, labels)
+            yield from (self.result(x, labels) for x in batch)
+
+    def __call__(self, inputs, candidate_labels, multi_label=True, batch_size=1, **kwargs):
+        if isinstance(inputs, str):
+            self._wait([inputs], candidate_labels)
+            return self.result(inputs, candidate_labels)
+        return self._batches(inputs, list(candidate_labels), batch_size)
+
+
+# ========= Benchmarks =========
+# each takes the shared run context and may return extra numbers worth keeping;
+# the per-call helpers are timed with one keyword per row, cycling through these
+NEGATION_KEYWORDS = sorted({kw for kws in AIAnalysis.ISSUE_KEYWORDS.values() for kw in kws})
+
+
+def bench_has_negation_window(ctx):
+    for c, kw in zip(ctx["lowered"], cycle(NEGATION_KEYWORDS)):
+        AIAnalysis.has_negation_window(c, kw)
+
+
+def bench_fuzzy_hit(ctx):
+    for c, kw in zip(ctx["lowered"], cycle(NEGATION_KEYWORDS)):
+        AIAnalysis.fuzzy_hit(c, kw, AIAnalysis.FUZZY_THRESHOLD)
+
+
+def bench_match_issues_rule_based(ctx):
+    ctx["rule_hits"] = [AIAnalysis.match_issues_rule_based(c, r) for c, r in zip(ctx["comments"], ctx["ratings"])]
+
+
+def bench_finalize_issues(ctx):
+    ai = ctx["ai_labels"]
+    ctx["issues"] = [AIAnalysis.finalize_issues(c, r, ai[c], rb)
+                     for c, r, rb in zip(ctx["comments"], ctx["ratings"], ctx["rule_hits"])]
+
+
+def bench_override_sentiment(ctx):
+    for c, iss, r in zip(ctx["comments"], ctx["issues"], ctx["ratings"]):
+        AIAnalysis.override_sentiment(c, iss, r)
+
+
+def bench_load_language(ctx):
+    import shutil
+    import TranslateFeedback as tf
+
+    path = os.path.join(ctx["tmp"], "lang.csv")
+    shutil.copyfile(ctx["csv"], path)
+    tf.detect_language.cache_clear()
+    cache = tf.TranslationCache(os.path.join(ctx["tmp"], f"translations-{time.time_ns()}.sqlite"))
+    engine = tf.TranslationEngine(tf.FakeBackend(latency=ctx["args"].translate_ms / 1000), rate=1000,
+                                  concurrency=8, cache=cache)
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):  # its progress line floods the report
+        tf.load_language(path, engine)
+    cache.close()
+    return {"translated": cache.misses, "backend_calls": engine.backend.calls}
+
+
+def _end_to_end(ctx, use_ai):
+    analyzer = AIAnalysis.ReviewAnalyzer(use_ai=use_ai)
+    stub = None
+    if use_ai:
+        stub = analyzer._zsc = StubZeroShot(batch_ms=ctx["args"].batch_ms, pair_ms=ctx["args"].pair_ms)
+    df = analyzer.classify(AIAnalysis.load_feedback(ctx["csv"]))
+    AIAnalysis.summarize(df)
+    AIAnalysis.negative_reviews(df).to_csv(os.path.join(ctx["tmp"], "negative_reviews.csv"), index=False)
+    extra = {"classified_pairs": analyzer.stats["classified"]}
+    if stub:
+        extra |= {"model_batches": stub.batches, "model_hypotheses": stub.pairs}
+    return extra
+
+
+def bench_e2e_rules(ctx):
+    return _end_to_end(ctx, use_ai=False)
+
+
+def bench_e2e_ai(ctx):
+    return _end_to_end(ctx, use_ai=True)
+
+
+BENCHMARKS = {
+    "has_negation_window": bench_has_negation_window,
+    "fuzzy_hit": bench_fuzzy_hit,
+    "match_issues_rule_based": bench_match_issues_rule_based,
+    "finalize_issues": bench_finalize_issues,
+    "override_sentiment": bench_override_sentiment,
+    "load_language": bench_load_language,
+    "e2e_rules": bench_e2e_rules,
+    "e2e_ai": bench_e2e_ai,
+}
+
+
+# shorthand groups for --only
+GROUPS = {
+    "rules": ["has_negation_window", "fuzzy_hit", "match_issues_rule_based", "finalize_issues", "override_sentiment"],
+    "e2e": ["e2e_rules", "e2e_ai"],
+}
+
+
+# ========= Runner =========
+def _context(rows: int, args, tmp: str) -> dict:
+    import csv
+
+    path = write_feedback(os.path.join(tmp, f"feedback-{rows}.csv"), rows, args.seed, args.mix)
+    with open(path, newline="", encoding="utf-8") as f:
+        records = list(csv.DictReader(f))
+    comments = [AIAnalysis.normalize_quotes(r["comment"]) for r in records]
+    ratings = [r["rating_type"] for r in records]
+    stub = StubZeroShot()
+    ai_labels = {c: AIAnalysis.pick_ai_labels(stub.result(c, AIAnalysis.ISSUE_CATEGORIES))
+                 for c in dict.fromkeys(comments)}
+    return {"csv": path, "tmp": tmp, "args": args, "comments": comments, "ratings": ratings,
+            "lowered": [c.lower() for c in comments], "ai_labels": ai_labels, "distinct": len(ai_labels)}
+
+
+def _git_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(names: list[str], sizes: list[int], args) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            print(f"📦 Generating {rows} rows...")
+            ctx = _context(rows, args, tmp)
+            # finalize/override need what the earlier rule benchmarks produce
+            if {"finalize_issues", "override_sentiment"} & set(names) and "match_issues_rule_based" not in names:
+                bench_match_issues_rule_based(ctx)
+            if "override_sentiment" in names and "finalize_issues" not in names:
+                bench_finalize_issues(ctx)
+
+            for name in names:
+                repeat = args.repeat if rows <= 100_000 else 1
+                best = None
+                for _ in range(repeat):
+                    wall, cpu = time.perf_counter(), time.process_time()
+                    extra = BENCHMARKS[name](ctx) or {}
+                    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+                    if best is None or wall < best["seconds"]:
+                        best = {"name": name, "rows": rows, "seconds": round(wall, 4), "cpu_seconds": round(cpu, 4),
+                                "us_per_row": round(wall / rows * 1e6, 3), **extra}
+                best["distinct_comments"] = ctx["distinct"]
+                results.append(best)
+                print(f"⏱️ {name:<26}{rows:>9} rows  {best['seconds']:>9.3f}s  {best['us_per_row']:>10.2f} µs/row")
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"seed": args.seed, "repeat": args.repeat, "batch_ms": args.batch_ms,
+                   "pair_ms": args.pair_ms, "translate_ms": args.translate_ms, "mix": dataclasses.asdict(args.mix)},
+        "results": results,
+    }
+
+
+def compare(base: dict, new: dict) -> str:
+    """Side-by-side seconds for the benchmarks both reports ran."""
+    old = {(r["name"], r["rows"]): r["seconds"] for r in base["results"]}
+    lines = [f"{'benchmark':<26}{'rows':>9}{base['commit']:>16}{new['commit']:>16}{'change':>9}"]
+    if base["config"].get("mix") != new["config"].get("mix"):
+        lines.insert(0, "⚠️ the two runs used different feedback mixes; timings may not be comparable")
+    for r in new["results"]:
+        before = old.get((r["name"], r["rows"]))
+        if before is None:
+            continue
+        change = f"{r['seconds'] / before:.2f}x" if before else "-"
+        lines.append(f"{r['name']:<26}{r['rows']:>9}{before:>15.3f}s{r['seconds']:>15.3f}s{change:>9}")
+    return "\n".join(lines)
+
+
+# ========= CLI =========
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Offline benchmarks for the feedback pipeline.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="row counts to run every benchmark at")
+    ap.add_argument("--only", nargs="+", default=None,
+                    help=f"benchmarks to run: {', '.join(BENCHMARKS)} or groups {', '.join(GROUPS)}")
+    ap.add_argument("--seed", type=int, default=0, help="synthetic feedback seed")
+    ap.add_argument("--repeat", type=int, default=REPEAT, help="best-of-N repeats for sizes up to 100k")
+    ap.add_argument("--batch-ms", type=float, default=4.0, help="stub model: fixed cost per batch")
+    ap.add_argument("--pair-ms", type=float, default=0.5,
+                    help="stub model: cost per (comment, label) hypothesis at 16 tokens")
+    ap.add_argument("--translate-ms", type=float, default=150.0, help="fake translator latency per batch")
+    add_mix_args(ap)
+    ap.add_argument("-o", "--output", default=None, help=f"results JSON (default {RESULTS_DIR}/<commit>.json)")
+    ap.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    args = ap.parse_args(argv)
+    args.mix = mix_from_args(args)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = []
+    for name in args.only or list(BENCHMARKS):
+        for n in GROUPS.get(name, [name]):
+            if n not in BENCHMARKS:
+                raise SystemExit(f"unknown benchmark {n!r}; choose from {', '.join(BENCHMARKS)}")
+            if n not in names:
+                names.append(n)
+    names.sort(key=list(BENCHMARKS).index)
+
+    report = run(names, args.sizes, args)
+    out = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import Counter
+
+_CHUNK = 500  # keep IN (...) lists under SQLite's variable limit
+
+
+def content_key(*parts) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def taxonomy_version(*tables) -> str:
+    """Stable hash of the category / keyword tables (sets are hashed sorted)."""
+    return content_key(json.dumps(tables, sort_keys=True, default=sorted, ensure_ascii=False))
+
+
+class ClassificationCache:
+    """
+    On-disk cache for classification work, keyed by content hash.
+
+    - scores:  per-label zero-shot scores, keyed by (model id, comment). With
+               multi_label=True every label is scored on its own, so editing
+               ISSUE_CATEGORIES only means scoring the labels that are new.
+    - results: rule hits, final issues and sentiment, keyed by (model id,
+               taxonomy version, rating_type, comment). Cheap to rebuild.
+
+    Both tables are trimmed to `max_entries`, least recently used first.
+    """
+
+    def __init__(self, path: str, model_id: str, max_entries=1_000_000):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.stats = Counter()
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, scores TEXT, used REAL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, rule_hits TEXT, "
+                        "issues TEXT, sentiment TEXT, used REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS scores_used ON scores(used)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results(used)")
+
+    # ---- keys ----
+    def score_key(self, text: str) -> str:
+        return content_key(self.model_id, text)
+
+    def result_key(self, text: str, rating_type: str, version: str) -> str:
+        return content_key(self.model_id, version, rating_type.lower(), text)
+
+    # ---- internals ----
+    def _fetch(self, table: str, cols: str, keys: list[str]) -> dict[str, tuple]:
+        rows = {}
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for row in self.db.execute(f"SELECT key, {cols} FROM {table} WHERE key IN ({marks})", chunk):
+                rows[row[0]] = row[1:]
+        if rows:
+            now = time.time()
+            self.db.executemany(f"UPDATE {table} SET used=? WHERE key=?", [(now, k) for k in rows])
+            # commit straight away: an open transaction would hold the write lock against other processes
+            self.db.commit()
+        return rows
+
+    # ---- zero-shot scores ----
+    def get_scores(self, texts) -> dict[str, dict[str, float]]:
+        """Whatever per-label scores are stored for each text (possibly a partial label set)."""
+        keys = {self.score_key(t): t for t in texts}
+        rows = self._fetch("scores", "scores", list(keys))
+        return {keys[k]: json.loads(v[0]) for k, v in rows.items()}
+
+    def put_scores(self, scores: dict[str, dict[str, float]]):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?, ?)",
+            [(self.score_key(t), json.dumps(s), now) for t, s in scores.items()],
+        )
+        self.db.commit()
+
+    # ---- final results ----
+    def get_results(self, pairs, version: str) -> dict[tuple[str, str], tuple[list[str], list[str], str]]:
+        """{(comment, rating_type): (rule_hits, issues, sentiment)} for the pairs already classified."""
+        keys = {self.result_key(t, r, version): (t, r) for t, r in pairs}
+        rows = self._fetch("results", "rule_hits, issues, sentiment", list(keys))
+        self.stats["results_hit"] += len(rows)
+        self.stats["results_miss"] += len(keys) - len(rows)
+        return {keys[k]: (json.loads(rb), json.loads(iss), sent) for k, (rb, iss, sent) in rows.items()}
+
+    def put_results(self, results: dict[tuple[str, str], tuple[list[str], list[str], str]], version: str):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            [(self.result_key(t, r, version), json.dumps(rb), json.dumps(iss), sent, now)
+             for (t, r), (rb, iss, sent) in results.items()],
+        )
+        self.db.commit()
+
+    # ---- housekeeping ----
+    def evict(self):
+        for table in ("scores", "results"):
+            (n,) = self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            if n > self.max_entries:
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE key IN "
+                    f"(SELECT key FROM {table} ORDER BY used ASC LIMIT ?)", (n - self.max_entries,)
+                )
+                self.stats[f"{table}_evicted"] += n - self.max_entries
+        self.db.commit()
+
+    def close(self):
+        self.evict()
+        self.db.close()
@@ -4,15 +4,40 @@ from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, quote
+import argparse
+import os
+import queue
+import shutil
+import threading
 import time
-import csv
-from TranslateFeedback import load_language
+from TranslateFeedback import TranslationCache, TranslationEngine, translate_records
+from FeedbackParser import parse_feedback_rows
+from ScrapeState import ScrapeState, append_feedback, feedback_key
+from RunMetrics import METRICS, add_metrics_args, finish_from_args, start_from_args
+
+# point at a local static-HTML stand-in server (tests/fixtures/standin) to exercise the scraper offline
+EBAY_BASE = "https://www.ebay.com"
+OUTPUT_DIR = "feedback"  # one CSV per seller, translated to English as each page is saved
+CSV_PATH = "test.csv"  # a single-target run also copies its seller's CSV here, AIAnalysis.py's default input
+MAX_NEW_FEEDBACK = 400  # per run; an unfinished run resumes from its checkpoint next time
+# keep seen ids per seller, append only new rows and stop at the first fully-seen page
+INCREMENTAL = True
+PAGE_TIMEOUT = 20
+CAPTCHA_TIMEOUT = 15 * 60
+
+DEFAULT_PRODUCT_URL = "https://www.ebay.com/itm/354393355064?_skw=iphone13&epid=7049287499&itmmeta=01K2WCSQJACMHT8PZFF8JM4DQY&hash=item52837d7338:g:DDcAAOSwEjhjcrCI&itmprp=enc%3AAQAKAAAAwFkggFvd1GGDu0w3yXCmi1f%2B%2FjHEMp5MNuP%2BXQLXcy%2BXSK80Qfxwxi8g%2BTS9Ak4m8uhjQxggaOgPEWSwFA3zvifDh%2FVHOT7hDE8g6Jbg7ZLXB9usTDS4hz0ep53px03l0O3ck8UtKQ6TrXOuEMJcByCyVpwRQRtn%2Fs28dC3GEOoISdHdcYF8x1u4kH%2FGHoss9XWCM3atpxLWNlzB45A1LIQpa%2FubmZVZuiyo4vTilE1zp3yCT%2Bkrafz7l7L6jCzMIw%3D%3D%7Ctkp%3ABlBMUJz65oyXZg"
 
 # -------- Setup Edge Options --------
 edge_driver_path = r"C:/Users/Swank/Downloads/edgedriver_win64/msedgedriver.exe"
 
+class ScrapeError(Exception):
+    """A seller couldn't be scraped; carries the (possibly relaunched) driver so it can be cleaned up."""
+    def __init__(self, message, driver=None):
+        super().__init__(message)
+        self.driver = driver
+
 def create_driver(headless=True):
     options = Options()
     if headless:
@@ -23,184 +48,359 @@ def create_driver(headless=True):
     service = Service(executable_path=edge_driver_path)
     return webdriver.Edge(service=service, options=options)
 
+def is_captcha(url: str) -> bool:
+    return "captcha" in url or "splashui" in url
+
+def wait_for_page_load(driver, timeout=PAGE_TIMEOUT):
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+
 def handle_captcha_if_present(driver, url):
-    time.sleep(2)
-    if "captcha" in driver.current_url or "splashui" in driver.current_url:
-        print("🧩 CAPTCHA detected. Relaunching browser in visible mode for manual solving...")
+    wait_for_page_load(driver)
+    if is_captcha(driver.current_url):
+        METRICS.count("captchas")
+        # only this worker's browser is handed over; the rest of the pool keeps scraping
+        print(f"🧩 CAPTCHA detected ({threading.current_thread().name}). Relaunching browser in visible mode for manual solving...")
         driver.quit()
         driver = create_driver(headless=False)
         driver.get(url)
-        while "captcha" in driver.current_url or "splashui" in driver.current_url:
-            print("⏳ Waiting for CAPTCHA to be solved...")
-            time.sleep(3)
+        print("⏳ Waiting for CAPTCHA to be solved...")
+        WebDriverWait(driver, CAPTCHA_TIMEOUT, poll_frequency=3).until(lambda d: not is_captcha(d.current_url))
+        wait_for_page_load(driver)
         print("✅ CAPTCHA solved. Continuing...")
     return driver
 
 def safe_get(driver, url, retries=3, wait=3):
     for attempt in range(retries):
+        start = time.perf_counter()
         try:
             driver.get(url)
             driver = handle_captcha_if_present(driver, url)
-            time.sleep(wait)
             if "about:blank" in driver.current_url:
                 raise Exception("Blank page loaded")
+            METRICS.count("page_loads", kind="navigate")
+            METRICS.observe("page_load_seconds", time.perf_counter() - start, kind="navigate")
             return driver
         except Exception as e:
+            METRICS.count("page_load_errors")
             print(f"⚠️ Navigation attempt {attempt+1} failed: {e}")
-            time.sleep(wait)
+            time.sleep(wait * (attempt + 1))  # back off before retrying a failed load
+    METRICS.count("page_load_failures")
     print("❌ Failed to load page after retries.")
-    driver.quit()
-    exit()
+    raise ScrapeError(f"Failed to load {url}", driver)
 
-def wait_for_feedback_rows():
-    WebDriverWait(driver, 20).until(
+def wait_for_feedback_rows(driver, timeout=PAGE_TIMEOUT):
+    WebDriverWait(driver, timeout).until(
         EC.presence_of_all_elements_located((By.CSS_SELECTOR, "tr[data-feedback-id]"))
     )
 
-def scrape_feedback_table():
+def first_feedback_id(driver):
+    return driver.execute_script(
+        "var r = document.querySelector('tr[data-feedback-id]');"
+        "return r ? r.getAttribute('data-feedback-id') : null;"
+    )
+
+def wait_for_new_rows(driver, old_id, timeout=PAGE_TIMEOUT):
+    """Wait until the table shows a different first row than `old_id` (page changed)."""
+    WebDriverWait(driver, timeout).until(lambda d: first_feedback_id(d) not in (None, old_id))
+
+def scrape_feedback_table(driver):
     for attempt in range(3):
         try:
-            rows = driver.find_elements(By.CSS_SELECTOR, "tr[data-feedback-id]")
-            if not rows:
+            # one page_source round trip instead of several WebDriver calls per row
+            data = parse_feedback_rows(driver.page_source)
+            if not data:
                 raise Exception("No feedback rows found")
-
-            data = []
-            for row in rows:
-                # Extract comment
-                comment_elem = row.find_element(By.CSS_SELECTOR, ".card__comment span[aria-label]")
-                comment = (comment_elem.get_attribute("aria-label") or "").strip()
-
-                # rating type via icon class
-                rating_type = "Unknown"
-                if row.find_elements(By.CSS_SELECTOR, "svg.icon--feedback-positive"):
-                    rating_type = "Positive"
-                elif row.find_elements(By.CSS_SELECTOR, "svg.icon--feedback-negative"):
-                    rating_type = "Negative"
-                elif row.find_elements(By.CSS_SELECTOR, "svg.icon--feedback-neutral"):
-                    rating_type = "Neutral"
-
-
-                # Extract date
-                try:
-                    date_elem = row.find_element(By.CSS_SELECTOR, "td span[aria-label*='Past']")
-                    date_txt = date_elem.get_attribute("aria-label").strip()
-                except NoSuchElementException:
-                    date_txt = "Unknown"
-
-                data.append({
-                    "comment": comment,
-                    "rating_type": rating_type,
-                    "date": date_txt
-                })
             return data
         except Exception as e:
             print(f"⚠️ Scraping attempt {attempt+1} failed: {e}")
-            time.sleep(2)
+            try:
+                wait_for_feedback_rows(driver, 5)
+            except TimeoutException:
+                pass
     print("❌ Failed to scrape feedback after 3 attempts.")
     return []
 
 def click_next_page(driver, retries=3):
+    """
+    True once the next page has loaded, False at the end of the results
+    (disabled or no next button), None if paginating kept failing.
+    """
+    old_id = first_feedback_id(driver)
     for attempt in range(retries):
         try:
-            next_btn = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "next-page"))
-            )
-            if not next_btn.is_enabled():
+            # a previous attempt's click may have landed late
+            if first_feedback_id(driver) not in (None, old_id):
+                return True
+            # the last page keeps a disabled button: stop there instead of waiting for it to become clickable
+            try:
+                next_btn = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.ID, "next-page"))
+                )
+            except TimeoutException:
+                print("🚪 No pagination on this page.")
+                return False
+            if not next_btn.is_enabled() or next_btn.get_attribute("aria-disabled") == "true":
+                print("🚪 No more pages.")
                 return False
             driver.execute_script("arguments[0].click();", next_btn)
-            time.sleep(3)
-            wait_for_feedback_rows()
+            wait_for_new_rows(driver, old_id)
             return True
         except Exception as e:
             print(f"⚠️ Pagination attempt {attempt+1} failed: {e}")
-            time.sleep(2)
-    print("🚪 No more pages or failed to paginate.")
-    return False
-
-# -------- Start Script --------
-driver = create_driver(headless=True)
-
-# -------- Step 1: Go to product page --------
-product_url = "https://www.ebay.com/itm/354393355064?_skw=iphone13&epid=7049287499&itmmeta=01K2WCSQJACMHT8PZFF8JM4DQY&hash=item52837d7338:g:DDcAAOSwEjhjcrCI&itmprp=enc%3AAQAKAAAAwFkggFvd1GGDu0w3yXCmi1f%2B%2FjHEMp5MNuP%2BXQLXcy%2BXSK80Qfxwxi8g%2BTS9Ak4m8uhjQxggaOgPEWSwFA3zvifDh%2FVHOT7hDE8g6Jbg7ZLXB9usTDS4hz0ep53px03l0O3ck8UtKQ6TrXOuEMJcByCyVpwRQRtn%2Fs28dC3GEOoISdHdcYF8x1u4kH%2FGHoss9XWCM3atpxLWNlzB45A1LIQpa%2FubmZVZuiyo4vTilE1zp3yCT%2Bkrafz7l7L6jCzMIw%3D%3D%7Ctkp%3ABlBMUJz65oyXZg"
-driver = safe_get(driver, product_url)
-
-# -------- Step 2: Try to find feedback profile URL --------
-feedback_url = None
-try:
-    store_link = driver.find_element(By.XPATH, "//a[contains(@href, '/str/')]")
-    store_url = store_link.get_attribute("href")
-    username = store_url.split("/")[-1].split("?")[0]
-    feedback_tab_url = f"https://www.ebay.com/str/{username}?_tab=feedback"
-    driver = safe_get(driver, feedback_tab_url)
-
-    feedback_button = driver.find_element(By.XPATH, "//a[contains(@href, 'feedback_profile')]")
-    feedback_url = feedback_button.get_attribute("href")
-except Exception as e:
-    try:
-        feedback_button = driver.find_element(By.XPATH, "//a[contains(@href, '/fdbk/feedback_profile/')]")
-        feedback_url = feedback_button.get_attribute("href")
-    except:
+    print("❌ Failed to paginate.")
+    return None
+
+# -------- Step 1-3: Resolve a product URL or seller name to the sorted feedback URL --------
+def find_feedback_url(driver, target):
+    if not target.startswith(("http://", "https://")):
+        feedback_url = f"{EBAY_BASE}/fdbk/feedback_profile/{target}"
+    else:
+        # -------- Step 1: Go to product page --------
+        driver = safe_get(driver, target)
+
+        # -------- Step 2: Try to find feedback profile URL --------
+        feedback_url = None
         try:
-            feedback_button = driver.find_element(By.XPATH, "//a[contains(@class, 'fdbk-detail-list___btn-container___btn')]")
+            store_link = driver.find_element(By.XPATH, "//a[contains(@href, '/str/')]")
+            store_url = store_link.get_attribute("href")
+            username = store_url.split("/")[-1].split("?")[0]
+            store_base = "{0.scheme}://{0.netloc}".format(urlparse(store_url))
+            feedback_tab_url = f"{store_base}/str/{username}?_tab=feedback"
+            driver = safe_get(driver, feedback_tab_url)
+
+            feedback_button = driver.find_element(By.XPATH, "//a[contains(@href, 'feedback_profile')]")
             feedback_url = feedback_button.get_attribute("href")
-        except Exception as final_e:
-            print("❌ Couldn't find feedback link:", final_e)
-            driver.quit()
-            exit()
+        except ScrapeError:
+            raise
+        except Exception:
+            try:
+                feedback_button = driver.find_element(By.XPATH, "//a[contains(@href, '/fdbk/feedback_profile/')]")
+                feedback_url = feedback_button.get_attribute("href")
+            except:
+                try:
+                    feedback_button = driver.find_element(By.XPATH, "//a[contains(@class, 'fdbk-detail-list___btn-container___btn')]")
+                    feedback_url = feedback_button.get_attribute("href")
+                except Exception as final_e:
+                    print("❌ Couldn't find feedback link:", final_e)
+                    raise ScrapeError(f"Couldn't find feedback link for {target}", driver)
 
-print("🔗 Feedback Profile URL:", feedback_url)
+    print("🔗 Feedback Profile URL:", feedback_url)
 
-# -------- Step 3: Modify feedback URL to sort by recent --------
-parsed = urlparse(feedback_url)
-query_params = parse_qs(parsed.query)
-query_params['filter'] = [quote('feedback_page: RECEIVED_AS_SELLER')]
-query_params['sort'] = ['RecentV2']
-for key in list(query_params):
-    if key not in ['filter', 'sort']:
-        del query_params[key]
-feedback_url = urlunparse(parsed._replace(query=urlencode(query_params, doseq=True)))
-driver = safe_get(driver, feedback_url)
+    # -------- Step 3: Modify feedback URL to sort by recent --------
+    parsed = urlparse(feedback_url)
+    query_params = parse_qs(parsed.query)
+    query_params['filter'] = [quote('feedback_page: RECEIVED_AS_SELLER')]
+    query_params['sort'] = ['RecentV2']
+    for key in list(query_params):
+        if key not in ['filter', 'sort']:
+            del query_params[key]
+    feedback_url = urlunparse(parsed._replace(query=urlencode(query_params, doseq=True)))
+    return driver, feedback_url
 
 # -------- Step 4: Click 200 items per page --------
-try:
-    wait_for_feedback_rows()
-    button_200 = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "button[aria-label*='Click to show 200 feedback ratings per page']"))
-    )
-    driver.execute_script("arguments[0].click();", button_200)
-    time.sleep(3)
-    wait_for_feedback_rows()
-except Exception as e:
-    print("⚠️ Could not set 200 per page:", e)
-
-# -------- Step 5: Scrape + Paginate --------
-all_feedback = []
-while len(all_feedback) < 400:
-    page_data = scrape_feedback_table()
-    all_feedback.extend(page_data)
-    print(f"📦 Scraped {len(all_feedback)} feedback entries...")
-    if not click_next_page(driver):
-        break
-
-# -------- Step 6: Save to test.csv without consecutive duplicates --------
-print(all_feedback)
-with open("test.csv", "w", newline='', encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["comment", "rating_type", "date"])
-    writer.writeheader()
-    last_row = None
-    unique_count = 0
-    for entry in all_feedback:
-        current_row = (entry["comment"], entry["rating_type"], entry["date"])
-        if current_row != last_row:
-            writer.writerow({
-                "comment": entry["comment"],
-                "rating_type": entry["rating_type"],
-                "date": entry["date"]
-            })
-            last_row = current_row
-            unique_count += 1
-
-load_language('test.csv')
-
-print(f"✅ Done! {unique_count} unique feedback entries saved to test.csv")
-driver.quit()
+def show_200_per_page(driver):
+    try:
+        wait_for_feedback_rows(driver)
+        old_id = first_feedback_id(driver)
+        button_200 = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[aria-label*='Click to show 200 feedback ratings per page']"))
+        )
+        driver.execute_script("arguments[0].click();", button_200)
+        # the first row usually stays the same, so wait for the longer table instead
+        WebDriverWait(driver, PAGE_TIMEOUT).until(
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, "tr[data-feedback-id]")) > 25
+            or first_feedback_id(d) not in (None, old_id)
+        )
+    except Exception as e:
+        print("⚠️ Could not set 200 per page:", e)
+
+# -------- Step 5: Scrape + Paginate, saving new rows after every page --------
+def seller_csv_path(output_dir, seller):
+    return os.path.join(output_dir, f"{seller}.csv")
+
+def scrape_seller(driver, target, output_dir=OUTPUT_DIR, engine=None):
+    """
+    Scrape one product URL or seller name into output_dir/<seller>.csv.
+    Returns (driver, seller, new rows); the driver may have been relaunched
+    if a CAPTCHA had to be solved.
+
+    Each page's new rows are translated before they are appended and only
+    the rows actually written are recorded as seen, so a failed translation
+    is retried by the next run instead of being lost.
+    """
+    own_engine = engine is None
+    if own_engine:
+        engine = TranslationEngine(cache=TranslationCache())
+    try:
+        driver, feedback_url = find_feedback_url(driver, target)
+        driver = safe_get(driver, feedback_url)
+        show_200_per_page(driver)
+
+        seller = urlparse(feedback_url).path.rstrip("/").split("/")[-1]
+        csv_path = seller_csv_path(output_dir, seller)
+        state = ScrapeState() if INCREMENTAL else None
+        seen = state.seen_ids(seller) if state else set()
+        resume_page = state.checkpoint(seller) if state else 0
+        if resume_page:
+            print(f"↩️ Resuming {seller}: pages 1-{resume_page} were saved by an interrupted run")
+        if not INCREMENTAL and os.path.exists(csv_path):
+            os.remove(csv_path)
+
+        unique_count = 0
+        page = 1
+        complete = False
+        while unique_count < MAX_NEW_FEEDBACK:
+            with METRICS.stage("scrape_page") as st:
+                page_data = scrape_feedback_table(driver)
+                st.rows = len(page_data)
+            METRICS.count("feedback_pages")
+            METRICS.count("feedback_rows_scraped", len(page_data))
+            new_rows = []
+            for entry in page_data:
+                key = feedback_key(entry)
+                if key not in seen:
+                    seen.add(key)
+                    new_rows.append(entry)
+
+            # sorted RecentV2: once a whole page is old, everything after it is too
+            # (pages an interrupted run already saved are walked past, not treated as the end)
+            if INCREMENTAL and page > resume_page and page_data and not new_rows:
+                print(f"🛑 {seller} page {page} has no new feedback, stopping.")
+                complete = True
+                break
+
+            with METRICS.stage("save_page", rows=len(new_rows)):
+                # emoji-only feedback can't be language-detected; it is kept as scraped
+                translated = translate_records(new_rows, engine, keep_undetected=True)
+                written = [(entry, row) for entry, row in zip(new_rows, translated) if row]
+                append_feedback(csv_path, [row for _, row in written])
+                if state:
+                    state.save_page(seller, page, [feedback_key(entry) for entry, _ in written])
+            METRICS.count("feedback_rows_new", len(written))
+            unique_count += len(written)
+            skipped = f", {len(new_rows) - len(written)} left for the next run" if len(written) < len(new_rows) else ""
+            print(f"📦 {seller} page {page}: {len(written)} new feedback entries{skipped} ({unique_count} this run)...")
+            start = time.perf_counter()
+            moved = click_next_page(driver)
+            if moved is None:
+                # keep the checkpoint: the next run walks past the saved pages and carries on from here
+                print(f"⏸️ {seller}: stopped at page {page}; the next run resumes after it")
+                break
+            if not moved:
+                complete = True
+                break
+            METRICS.count("page_loads", kind="paginate")
+            METRICS.observe("page_load_seconds", time.perf_counter() - start, kind="paginate")
+            page += 1
+
+        if state:
+            if complete:
+                state.finish(seller)
+            state.close()
+        if engine.failed:
+            print(f"⚠️ {seller}: {engine.failed} comments could not be translated and were not saved")
+        return driver, seller, unique_count
+    except ScrapeError:
+        raise
+    except Exception as e:
+        raise ScrapeError(str(e), driver) from e
+    finally:
+        if own_engine and engine.cache:
+            engine.cache.close()
+
+# -------- Batch mode: many sellers on a pool of reusable browsers --------
+def scrape_many(targets, workers=4, headless=True, output_dir=OUTPUT_DIR) -> dict:
+    """
+    Scrape several product URLs / seller names with up to `workers` browsers.
+    Each worker owns one driver and one queue (filled round-robin) and steals
+    from the longest remaining queue once its own is empty. Returns {target: new rows or error}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    queues = [queue.Queue() for _ in range(max(1, min(workers, len(targets))))]
+    for i, target in enumerate(targets):
+        queues[i % len(queues)].put(target)
+    results = {}
+    lock = threading.Lock()
+
+    def next_target(i):
+        # own queue first, then steal from whichever other queue has the most left
+        others = sorted(queues[:i] + queues[i + 1:], key=lambda q: q.qsize(), reverse=True)
+        for q in [queues[i], *others]:
+            try:
+                return q.get_nowait()
+            except queue.Empty:
+                continue
+        return None
+
+    def worker(i):
+        driver = create_driver(headless=headless)
+        try:
+            while (target := next_target(i)) is not None:
+                try:
+                    driver, seller, count = scrape_seller(driver, target, output_dir)
+                    result = count
+                except ScrapeError as e:
+                    print(f"❌ {target}: {e}")
+                    result = e
+                    # start the next job on a clean browser
+                    for d in (driver, e.driver):
+                        try:
+                            d and d.quit()
+                        except Exception:
+                            pass
+                    driver = create_driver(headless=headless)
+                with lock:
+                    results[target] = result
+        finally:
+            driver.quit()
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"scraper-{i}") for i in range(len(queues))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def main(argv=None):
+    global EBAY_BASE
+    ap = argparse.ArgumentParser(description="Scrape eBay seller feedback into CSV.")
+    ap.add_argument("targets", nargs="*", help="product URLs or seller names (default: the built-in product)")
+    ap.add_argument("--workers", type=int, default=4, help="browsers to run in parallel for several targets")
+    ap.add_argument("--visible", action="store_true", help="don't run browsers headless")
+    ap.add_argument("--output-dir", default=OUTPUT_DIR, help="folder for the per-seller CSVs")
+    ap.add_argument("--base-url", default=EBAY_BASE, help="eBay base URL (e.g. a local stand-in server)")
+    add_metrics_args(ap)
+    args = ap.parse_args(argv)
+
+    EBAY_BASE = args.base_url.rstrip("/")
+    start_from_args(args)
+
+    if len(args.targets) > 1:
+        results = scrape_many(args.targets, args.workers, not args.visible, args.output_dir)
+        done = sum(isinstance(r, int) for r in results.values())
+        print(f"✅ Done! {done}/{len(results)} sellers scraped into {args.output_dir}/")
+        finish_from_args(args, sellers=len(results), sellers_done=done)
+        return
+
+    target = args.targets[0] if args.targets else DEFAULT_PRODUCT_URL
+    os.makedirs(args.output_dir, exist_ok=True)
+    driver = create_driver(headless=not args.visible)
+    try:
+        driver, seller, unique_count = scrape_seller(driver, target, args.output_dir)
+    except ScrapeError as e:
+        print(f"❌ {e}")
+        (e.driver or driver).quit()
+        finish_from_args(args, sellers=1, sellers_done=0)
+        exit()
+    csv_path = seller_csv_path(args.output_dir, seller)
+    print(f"✅ Done! {unique_count} new feedback entries saved to {csv_path}")
+    if os.path.exists(csv_path):
+        shutil.copyfile(csv_path, CSV_PATH)
+        print(f"📄 Copied to {CSV_PATH} for AIAnalysis.py")
+    driver.quit()
+    finish_from_args(args, sellers=1, sellers_done=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Collapse repeated feedback before classification: exact matches on a
+normalized form first, then near-duplicates found with MinHash + LSH.
+"""
+import re
+import zlib
+from collections import Counter
+import numpy as np
+from KeywordMatcher import NEGATIONS
+
+DEDUP_THRESHOLD = 0.9  # Jaccard similarity of character shingles
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def normalize_comment(text: str) -> str:
+    """Lowercase, punctuation to spaces, whitespace collapsed: "Great seller!!" == "great  seller"."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def shingles(text: str, k=3) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + k] for i in range(max(1, len(padded) - k + 1))}
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _negation_cues(norm: str) -> frozenset[str]:
+    return frozenset(w for w in norm.split() if w in NEGATIONS or w.endswith("n't"))
+
+
+def _lsh_shape(num_perm: int, threshold: float) -> tuple[int, int]:
+    """(bands, rows): the fewest candidates that still find ~99% of pairs at the threshold."""
+    shapes = [(num_perm // r, r) for r in range(num_perm, 0, -1) if num_perm % r == 0]
+    for b, r in shapes:
+        if 1 - (1 - threshold ** r) ** b >= 0.99:
+            return b, r
+    return shapes[-1]
+
+
+class CommentDeduper:
+    """
+    Maps every distinct comment to the representative of its group:
+    1. exact: comments with the same normalize_comment() form
+    2. near: normalized forms whose shingle Jaccard similarity to a group's
+       leader is >= threshold (MinHash/LSH finds the candidates, the real
+       Jaccard decides). Heaviest forms become leaders first, so every member
+       is within the threshold of its own representative. Forms with
+       different negation words ("not", "doesn't", ...) are never merged.
+
+    threshold >= 1 keeps only the exact step. `stats` accumulates across calls.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=64, shingle=3, seed=1):
+        self.threshold = threshold
+        self.shingle = shingle
+        self.bands, self.rows = _lsh_shape(num_perm, min(threshold, 1.0))
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.stats = Counter()
+
+    def signature(self, sh: set[str]) -> np.ndarray:
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        # multiply-shift hashing; uint64 arithmetic wraps, which is what we want
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)).min(axis=1)
+
+    def representatives(self, comments) -> dict[str, str]:
+        """{comment: representative comment} for every distinct comment."""
+        counts = Counter(comments)
+        # all-punctuation comments ("!!!", "") have no normalized form; keep them as they are
+        norm_of = {c: normalize_comment(c) or c for c in counts}
+
+        # 1. exact groups; the most frequent raw spelling represents each
+        variants = {}
+        for c, n in counts.items():
+            variants.setdefault(norm_of[c], Counter())[c] += n
+        weight = {norm: sum(v.values()) for norm, v in variants.items()}
+
+        # 2. near-duplicate groups over the normalized forms
+        leader_of = {}
+        if self.threshold >= 1:
+            leader_of = {norm: norm for norm in variants}
+        else:
+            buckets = {}
+            leaders = {}
+            for norm in sorted(variants, key=weight.get, reverse=True):
+                sh = shingles(norm, self.shingle)
+                cues = _negation_cues(norm)
+                sig = self.signature(sh)
+                keys = [(i, sig[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+                best, best_sim = None, self.threshold
+                for cand in dict.fromkeys(lead for k in keys for lead in buckets.get(k, ())):
+                    c_sh, c_cues = leaders[cand]
+                    if c_cues == cues:
+                        sim = jaccard(sh, c_sh)
+                        if sim >= best_sim:
+                            best, best_sim = cand, sim
+                if best is None:
+                    best = norm
+                    leaders[norm] = (sh, cues)
+                    for k in keys:
+                        buckets.setdefault(k, []).append(norm)
+                leader_of[norm] = best
+
+        rep_of = {norm: v.most_common(1)[0][0] for norm, v in variants.items()}
+        self.stats["rows"] += sum(counts.values())
+        self.stats["distinct"] += len(counts)
+        self.stats["exact_groups"] += len(variants)
+        self.stats["groups"] += len(set(leader_of.values()))
+        return {c: rep_of[leader_of[norm_of[c]]] for c in counts}
+
+
+def format_collapse(stats: Counter) -> str:
+    rows, groups = stats["rows"], stats["groups"]
+    ratio = rows / groups if groups else 1.0
+    return (f"{rows} rows → {stats['distinct']} distinct comments → {stats['exact_groups']} after normalizing "
+            f"→ {groups} near-duplicate groups (collapse ratio {ratio:.1f}x)")
@@ -0,0 +1,248 @@
+"""
+Embedding backend for the AI fallback: one encoder pass per comment, then a
+cosine similarity against every label at once, instead of one NLI forward
+pass per (comment, label) hypothesis.
+"""
+import json
+import math
+import os
+import numpy as np
+from ClassificationCache import taxonomy_version
+
+EMBED_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+LABEL_CACHE_PATH = "label_embeddings.npz"
+THRESHOLDS_PATH = "label_thresholds.json"
+DEFAULT_THRESHOLD = 0.45  # cosine similarity for labels that were never calibrated
+SCORE_SCALE = 20.0        # steepness of the similarity -> score mapping
+POOLING = "masked-mean"   # part of the label / cache version: vectors from another pooling are stale
+
+
+def label_texts(categories, keywords) -> dict[str, list[str]]:
+    """What each label is embedded from: its name plus its rule keywords."""
+    return {lbl: [lbl.lower(), *keywords.get(lbl, [])] for lbl in categories}
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    return m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Mean of each row's token vectors over its attention mask, so padding doesn't count."""
+    mask = mask[..., None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class EmbeddingClassifier:
+    """
+    Scores comments against ISSUE_CATEGORIES by embedding similarity.
+
+    Each label vector is the normalized mean of its name and keyword
+    embeddings; it is computed once and kept in `label_cache`, keyed by the
+    model id and the label texts. A comment is then a single forward pass
+    plus one row of a (comments x labels) matrix product.
+
+    `thresholds` holds a cosine cut-off per label (see calibrate_thresholds).
+    result() maps similarities onto scores that cross `min_conf` exactly at
+    a label's threshold, so pick_ai_labels works unchanged.
+    """
+
+    def __init__(self, categories, keywords, model_id=EMBED_MODEL_ID, batch_size=32,
+                 label_cache=LABEL_CACHE_PATH, thresholds: dict[str, float] | None = None):
+        self.categories = list(categories)
+        self.label_texts = label_texts(self.categories, keywords)
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.label_cache = label_cache
+        self.thresholds = {lbl: DEFAULT_THRESHOLD for lbl in self.categories}
+        self.thresholds.update({k: v for k, v in (thresholds or {}).items() if k in self.thresholds})
+        self.label_version = taxonomy_version(self.model_id, POOLING, self.categories, self.label_texts)
+        self._tokenizer = None
+        self._model = None
+        self._labels = None
+
+    @property
+    def cache_id(self) -> str:
+        """Model id for ClassificationCache: stored similarities stay valid until the label texts change."""
+        return f"{self.model_id}#{self.label_version[:12]}"
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        return self._tokenizer
+
+    @property
+    def model(self):
+        if self._model is None:
+            from transformers import AutoModel
+            self._model = AutoModel.from_pretrained(self.model_id).eval()
+        return self._model
+
+    def _forward(self, batch: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Token vectors (batch x tokens x dim) and the attention mask for one padded batch."""
+        import torch
+        enc = self.tokenizer(batch, padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            hidden = self.model(**enc).last_hidden_state
+        return hidden.float().cpu().numpy(), enc["attention_mask"].cpu().numpy()
+
+    def embed(self, texts) -> np.ndarray:
+        """
+        Mean-pooled, L2-normalized vectors, one row per text. Texts are fed
+        shortest-first to keep padding low; pooling over the attention mask
+        keeps a text's vector the same whatever it was batched with.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        rows = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            hidden, mask = self._forward([texts[i] for i in idx])
+            for i, v in zip(idx, mean_pool(hidden, mask)):
+                rows[i] = v
+        return _normalize(np.stack(rows).astype(np.float32))
+
+    # ---- label vectors ----
+    def _load_labels(self) -> np.ndarray | None:
+        if not self.label_cache or not os.path.exists(self.label_cache):
+            return None
+        with np.load(self.label_cache) as z:
+            if str(z["key"]) == self.label_version and z["vectors"].shape[0] == len(self.categories):
+                return z["vectors"]
+        return None
+
+    def _save_labels(self, vectors: np.ndarray):
+        if not self.label_cache:
+            return
+        tmp = self.label_cache + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, key=np.array(self.label_version), vectors=vectors)
+        os.replace(tmp, self.label_cache)
+
+    @property
+    def label_matrix(self) -> np.ndarray:
+        """(labels x dim) matrix, rows in `categories` order."""
+        if self._labels is None:
+            self._labels = self._load_labels()
+        if self._labels is None:
+            flat = [t for lbl in self.categories for t in self.label_texts[lbl]]
+            vecs = self.embed(flat)
+            bounds = np.cumsum([0] + [len(self.label_texts[lbl]) for lbl in self.categories])
+            self._labels = _normalize(np.stack([vecs[a:b].mean(axis=0) for a, b in zip(bounds, bounds[1:])]))
+            self._save_labels(self._labels)
+        return self._labels
+
+    # ---- scoring ----
+    def similarity_matrix(self, texts) -> np.ndarray:
+        """Cosine similarity of each text to each label: (texts x labels)."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, len(self.categories)), dtype=np.float32)
+        return self.embed(texts) @ self.label_matrix.T
+
+    def similarities(self, texts) -> dict[str, dict[str, float]]:
+        texts = list(dict.fromkeys(texts))
+        sims = self.similarity_matrix(texts)
+        return {t: dict(zip(self.categories, map(float, row))) for t, row in zip(texts, sims)}
+
+    def result(self, text: str, sims: dict[str, float], min_conf: float) -> dict:
+        """Pipeline-style result; a label scores >= min_conf iff its similarity reaches its threshold."""
+        p = min(max(min_conf, 1e-6), 1 - 1e-6)
+        bias = math.log(p / (1 - p))
+        scores = {}
+        for lbl in self.categories:
+            z = SCORE_SCALE * (sims[lbl] - self.thresholds[lbl]) + bias
+            scores[lbl] = 1 / (1 + math.exp(-z)) if z > -700 else 0.0
+        ranked = sorted(self.categories, key=lambda lbl: scores[lbl], reverse=True)
+        return {"sequence": text, "labels": ranked, "scores": [scores[lbl] for lbl in ranked]}
+
+
+# ========= Calibration =========
+def calibrate_thresholds(sims: np.ndarray, reference: np.ndarray, labels) -> dict[str, float]:
+    """
+    Per-label cosine cut-off that best reproduces a reference labelling
+    (normally NLI score >= min_conf on the same texts): the cut with the
+    highest F1 for that label. Labels the reference never assigns get a cut
+    just above every similarity seen, so they stay off.
+    """
+    thresholds = {}
+    for j, lbl in enumerate(labels):
+        s, y = sims[:, j], reference[:, j].astype(bool)
+        if not len(s):
+            continue
+        if not y.any():
+            thresholds[lbl] = float(s.max()) + 1e-6
+            continue
+        order = np.argsort(-s, kind="stable")
+        tp = np.cumsum(y[order])
+        f1 = 2 * tp / (np.arange(1, len(s) + 1) + y.sum())
+        best = int(np.argmax(f1))
+        # cut halfway between the last similarity let in and the next one down
+        lo = s[order[best]]
+        hi = s[order[best + 1]] if best + 1 < len(s) else lo - 1e-3
+        thresholds[lbl] = float((lo + hi) / 2)
+    return thresholds
+
+
+def load_thresholds(path: str, model_id: str) -> dict[str, float]:
+    """Saved thresholds for this embedding model ({} if none)."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get(model_id, {})
+
+
+def save_thresholds(path: str, model_id: str, thresholds: dict[str, float]):
+    saved = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+    saved[model_id] = thresholds
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(saved, f, indent=2, sort_keys=True)
+
+
+# ========= Agreement =========
+def agreement_report(reference: dict[str, list[str]], candidate: dict[str, list[str]], labels) -> dict:
+    """How closely `candidate` labels track `reference` over the texts both scored."""
+    texts = [t for t in reference if t in candidate]
+    exact = 0
+    jaccard = 0.0
+    per_label = {lbl: {"reference": 0, "candidate": 0, "both": 0} for lbl in labels}
+    for t in texts:
+        ref, cand = set(reference[t]), set(candidate[t])
+        exact += ref == cand
+        jaccard += len(ref & cand) / len(ref | cand) if ref | cand else 1.0
+        for lbl in ref:
+            per_label[lbl]["reference"] += 1
+        for lbl in cand:
+            per_label[lbl]["candidate"] += 1
+        for lbl in ref & cand:
+            per_label[lbl]["both"] += 1
+    for c in per_label.values():
+        c["precision"] = c["both"] / c["candidate"] if c["candidate"] else None
+        c["recall"] = c["both"] / c["reference"] if c["reference"] else None
+    n = len(texts)
+    return {
+        "texts": n,
+        "exact": exact / n if n else None,
+        "jaccard": jaccard / n if n else None,
+        "labels": per_label,
+    }
+
+
+def format_agreement(report: dict) -> str:
+    pct = lambda x: "   -  " if x is None else f"{x:6.1%}"
+    lines = [
+        f"texts compared: {report['texts']}",
+        f"identical label sets: {pct(report['exact'])}   mean Jaccard: {pct(report['jaccard'])}",
+        f"{'label':<24}{'NLI':>6}{'embed':>7}{'both':>6}{'prec':>8}{'recall':>8}",
+    ]
+    for lbl, c in report["labels"].items():
+        if c["reference"] or c["candidate"]:
+            lines.append(f"{lbl:<24}{c['reference']:>6}{c['candidate']:>7}{c['both']:>6}"
+                         f"{pct(c['precision']):>8}{pct(c['recall']):>8}")
+    return "\n".join(lines)
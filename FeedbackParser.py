@@ -0,0 +1,46 @@
+from lxml import html as lxml_html
+
+# XPath equivalents of the CSS selectors the scraper used per row
+ROWS_XPATH = "//tr[@data-feedback-id]"
+COMMENT_XPATH = ".//*[contains(concat(' ', normalize-space(@class), ' '), ' card__comment ')]//span[@aria-label]/@aria-label"
+DATE_XPATH = ".//td//span[contains(@aria-label, 'Past')]/@aria-label"
+RATING_ICONS = (
+    ("Positive", "icon--feedback-positive"),
+    ("Negative", "icon--feedback-negative"),
+    ("Neutral", "icon--feedback-neutral"),
+)
+
+
+def _has_icon(row, cls: str) -> bool:
+    return bool(row.xpath(
+        f".//*[local-name()='svg' and contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+    ))
+
+
+def parse_feedback_rows(page_html: str) -> list[dict]:
+    """
+    Extract every feedback row from a feedback page's HTML in one pass.
+    Pure function: feed it driver.page_source or a saved HTML file.
+    """
+    if not page_html or not page_html.strip():
+        return []
+    doc = lxml_html.fromstring(page_html)
+
+    data = []
+    for row in doc.xpath(ROWS_XPATH):
+        comments = row.xpath(COMMENT_XPATH)
+        comment = (comments[0] if comments else "").strip()
+
+        # rating type via icon class
+        rating_type = next((r for r, cls in RATING_ICONS if _has_icon(row, cls)), "Unknown")
+
+        dates = row.xpath(DATE_XPATH)
+        date_txt = dates[0].strip() if dates else "Unknown"
+
+        data.append({
+            "feedback_id": row.get("data-feedback-id"),
+            "comment": comment,
+            "rating_type": rating_type,
+            "date": date_txt
+        })
+    return data
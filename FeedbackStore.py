@@ -0,0 +1,345 @@
+"""
+Columnar store for classified feedback, with a per-seller aggregate kept
+up to date as rows land.
+
+    feedback_store/
+        rows/seller=<seller>/scrape_date=<YYYY-MM-DD>/part-<id>.parquet
+        aggregates.sqlite
+
+    python FeedbackStore.py top SELLER --days 90
+    python FeedbackStore.py sellers
+    python FeedbackStore.py rebuild
+
+Rows keep their issues as the uint32 issue_mask (bit order saved in the
+store and in every file's metadata) and rating / sentiment as dictionary
+columns. Each append also adds its counts to `issue_counts` and
+`row_counts` (seller x week x issue x sentiment), so dashboard queries
+read a few hundred aggregate rows instead of the Parquet files.
+
+eBay only shows relative dates ("Past month"), so the week is the week
+of the scrape date: with incremental scraping that is the week a
+feedback entry first appeared.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from urllib.parse import quote
+from RunMetrics import METRICS
+
+STORE_PATH = "feedback_store"
+SWEEP_GRACE = 3600  # seconds before an uncommitted part counts as abandoned (an append may still own it)
+_CHUNK = 500  # keep IN (...) lists under SQLite's variable limit
+
+
+def week_start(day) -> str:
+    """Monday of the week containing `day` (a date or an ISO date string)."""
+    day = dt.date.fromisoformat(day) if isinstance(day, str) else day
+    return (day - dt.timedelta(days=day.weekday())).isoformat()
+
+
+def _text_column(df, name: str):
+    import pandas as pd
+
+    if name not in df:
+        return pd.Series("", index=df.index, dtype=object)
+    col = df[name]
+    if pd.api.types.is_float_dtype(col):
+        col = col.astype("Int64")  # integer ids come back as floats when some are missing
+    return col.astype("string").fillna("").astype(object)
+
+
+def row_keys(df):
+    """
+    The feedback id; rows without one (not from the scraper) fall back to their
+    content plus their row number in the input, so repeated "A+++" rows stay
+    distinct while re-running the same file (whole or in chunks) adds nothing.
+    """
+    ids = _text_column(df, "feedback_id")
+    content = (_text_column(df, "comment") + "|" + _text_column(df, "rating_type") + "|"
+               + _text_column(df, "date") + "@" + df.index.astype(str))
+    return ids.where(ids != "", content)
+
+
+class FeedbackStore:
+    """
+    Appends classified frames (AIAnalysis.ReviewAnalyzer.classify output)
+    to the Parquet dataset and the aggregate tables in one step.
+
+    `labels` is the issue_mask bit order (AIAnalysis.ISSUE_LABELS). It is
+    saved on first write; opening the store with a different order raises,
+    since the stored masks would be misread. Read-only use can omit it, and
+    then nothing on disk is touched; a writer (opened with labels) first
+    sweeps up files abandoned by appends that never committed.
+
+    Feedback keys (see row_keys) already stored for a seller are skipped, so
+    re-running the analysis on a seller's whole CSV only adds the new rows.
+    """
+
+    def __init__(self, path=STORE_PATH, labels: list[str] | None = None):
+        self.path = path
+        self.rows_path = os.path.join(path, "rows")
+        os.makedirs(self.rows_path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, "aggregates.sqlite"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS issue_counts (seller TEXT, week TEXT, issue TEXT, "
+                        "sentiment TEXT, n INTEGER, PRIMARY KEY (seller, week, issue, sentiment)) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS row_counts (seller TEXT, week TEXT, sentiment TEXT, "
+                        "n INTEGER, PRIMARY KEY (seller, week, sentiment)) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS ingested (seller TEXT, key TEXT, "
+                        "PRIMARY KEY (seller, key)) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS parts (path TEXT PRIMARY KEY, seller TEXT, "
+                        "scrape_date TEXT, rows INTEGER, added REAL)")
+        self.db.commit()
+        self.labels = self._check_labels(labels)
+        if labels is not None:
+            self.sweep()
+
+    def _check_labels(self, labels) -> list[str] | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key='issue_labels'").fetchone()
+        saved = json.loads(row[0]) if row else None
+        if labels is None:
+            return saved
+        labels = list(labels)
+        if saved is not None and saved != labels:
+            raise ValueError(f"{self.path} was written with a different issue label order; "
+                             "rebuild it or use a new store")
+        if saved is None:
+            with self.db:
+                self.db.execute("INSERT INTO meta VALUES ('issue_labels', ?)", (json.dumps(labels),))
+        return labels
+
+    def sweep(self, grace=SWEEP_GRACE) -> int:
+        """
+        Remove files from appends that never committed (temp files, or a crash
+        between the rename and the commit); returns how many. Only files older
+        than `grace` seconds go, so appends still running elsewhere keep theirs.
+        """
+        cutoff = time.time() - grace
+        known = {p for (p,) in self.db.execute("SELECT path FROM parts")}
+        removed = 0
+        for root, _, files in os.walk(self.rows_path):
+            for name in files:
+                full = os.path.join(root, name)
+                if not (name.startswith(".") or
+                        (name.endswith(".parquet") and os.path.relpath(full, self.rows_path) not in known)):
+                    continue
+                try:
+                    if os.path.getmtime(full) < cutoff:
+                        os.remove(full)
+                        removed += 1
+                except FileNotFoundError:
+                    pass  # another writer swept it first
+        return removed
+
+    def close(self):
+        self.db.close()
+
+    # ---- writing ----
+    def _stored_keys(self, seller: str, keys: list[str]) -> set[str]:
+        found = set()
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(k for (k,) in self.db.execute(
+                f"SELECT key FROM ingested WHERE seller=? AND key IN ({marks})", [seller, *chunk]))
+        return found
+
+    def _tally(self, masks, sentiments) -> tuple[Counter, Counter]:
+        """(issue, sentiment) and sentiment counts, decoding each distinct (mask, sentiment) once."""
+        issues, totals = Counter(), Counter()
+        for (mask, sent), n in Counter(zip(map(int, masks), sentiments)).items():
+            totals[sent] += n
+            for i, lbl in enumerate(self.labels):
+                if mask >> i & 1:
+                    issues[(lbl, sent)] += n
+        return issues, totals
+
+    def _add_counts(self, seller: str, week: str, issues: Counter, totals: Counter):
+        self.db.executemany(
+            "INSERT INTO issue_counts VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (seller, week, issue, sentiment) DO UPDATE SET n = n + excluded.n",
+            [(seller, week, lbl, sent, n) for (lbl, sent), n in issues.items()])
+        self.db.executemany(
+            "INSERT INTO row_counts VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (seller, week, sentiment) DO UPDATE SET n = n + excluded.n",
+            [(seller, week, sent, n) for sent, n in totals.items()])
+
+    def append(self, df, seller: str, scrape_date=None) -> int:
+        """
+        Store the rows of a classified frame that aren't stored yet for this
+        seller; returns how many were new. The Parquet part, the stored keys
+        and the aggregate counts are committed together.
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.labels is None:
+            raise ValueError("open the store with the issue labels before writing to it")
+        scrape_date = scrape_date or dt.date.today()
+        scrape_date = dt.date.fromisoformat(scrape_date) if isinstance(scrape_date, str) else scrape_date
+
+        keys = row_keys(df)
+        fresh = ~keys.duplicated().to_numpy()
+        stored = self._stored_keys(seller, list(dict.fromkeys(keys[fresh])))
+        if stored:
+            fresh &= ~keys.isin(stored).to_numpy()
+        new, keys = df[fresh], keys[fresh]
+        if not len(new):
+            return 0
+
+        with METRICS.stage("store_write", rows=len(new)):
+            out = pd.DataFrame({c: _text_column(new, c) for c in ("feedback_id", "comment")})
+            out["rating_type"] = _text_column(new, "rating_type").astype("category")
+            out["date"] = _text_column(new, "date").astype("category")
+            out["issue_mask"] = new["issue_mask"].to_numpy().astype("uint32")
+            out["final_sentiment"] = new["final_sentiment"].astype(str).astype("category")
+            table = pa.Table.from_pandas(out, preserve_index=False).replace_schema_metadata(
+                {"issue_labels": json.dumps(self.labels)})
+
+            part_dir = os.path.join(self.rows_path, f"seller={quote(seller, safe='')}",
+                                    f"scrape_date={scrape_date.isoformat()}")
+            os.makedirs(part_dir, exist_ok=True)
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp = os.path.join(part_dir, "." + name)  # dot files are invisible to dataset readers
+            pq.write_table(table, tmp, compression="zstd")
+
+            issues, totals = self._tally(out["issue_mask"], out["final_sentiment"].astype(str))
+            rel = os.path.relpath(os.path.join(part_dir, name), self.rows_path)
+            try:
+                with self.db:
+                    self.db.executemany("INSERT INTO ingested VALUES (?, ?)", [(seller, k) for k in keys])
+                    self._add_counts(seller, week_start(scrape_date), issues, totals)
+                    self.db.execute("INSERT INTO parts VALUES (?, ?, ?, ?, ?)",
+                                    (rel, seller, scrape_date.isoformat(), len(out), time.time()))
+                    os.replace(tmp, os.path.join(part_dir, name))
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        METRICS.count("rows_stored", len(out))
+        return len(out)
+
+    def rebuild_aggregates(self) -> int:
+        """Recount issue_counts / row_counts from the Parquet parts; returns the rows read."""
+        import pyarrow.parquet as pq
+
+        if self.labels is None:
+            raise ValueError("the store has no issue labels yet")
+        parts = self.db.execute("SELECT path, seller, scrape_date FROM parts").fetchall()
+        with self.db:
+            self.db.execute("DELETE FROM issue_counts")
+            self.db.execute("DELETE FROM row_counts")
+            n_rows = 0
+            for rel, seller, scrape_date in parts:
+                t = pq.read_table(os.path.join(self.rows_path, rel), columns=["issue_mask", "final_sentiment"])
+                issues, totals = self._tally(t["issue_mask"].to_numpy(),
+                                             [str(s) for s in t["final_sentiment"].to_pylist()])
+                self._add_counts(seller, week_start(scrape_date), issues, totals)
+                n_rows += t.num_rows
+        return n_rows
+
+    # ---- reading ----
+    def _since(self, days: int | None, today=None) -> str:
+        """First week start of the last `days` days (whole weeks, so the window rounds out)."""
+        if days is None:
+            return ""
+        today = today or dt.date.today()
+        return week_start(today - dt.timedelta(days=days))
+
+    def sellers(self) -> list[tuple[str, int]]:
+        """(seller, stored rows), most rows first."""
+        return self.db.execute("SELECT seller, SUM(n) FROM row_counts GROUP BY seller "
+                               "ORDER BY SUM(n) DESC, seller").fetchall()
+
+    def sentiment_counts(self, seller: str, days: int | None = None, today=None) -> dict[str, int]:
+        return dict(self.db.execute(
+            "SELECT sentiment, SUM(n) FROM row_counts WHERE seller=? AND week>=? GROUP BY sentiment",
+            (seller, self._since(days, today))))
+
+    def top_issues(self, seller: str, days: int | None = 90, k=10, sentiment: str | None = None,
+                   today=None) -> list[dict]:
+        """
+        The seller's most frequent issues over the last `days` days (None: all
+        time), optionally only on rows with one final sentiment. `share` is the
+        fraction of the seller's rows (with that sentiment) carrying the issue.
+        """
+        since = self._since(days, today)
+        where, params = "seller=? AND week>=?", [seller, since]
+        if sentiment:
+            where += " AND sentiment=?"
+            params.append(sentiment)
+        total = self.db.execute(f"SELECT COALESCE(SUM(n), 0) FROM row_counts WHERE {where}", params).fetchone()[0]
+        rows = self.db.execute(f"SELECT issue, SUM(n) FROM issue_counts WHERE {where} GROUP BY issue "
+                               "ORDER BY SUM(n) DESC, issue LIMIT ?", [*params, k]).fetchall()
+        return [{"issue": issue, "count": n, "share": n / total if total else None} for issue, n in rows]
+
+    def weekly_counts(self, seller: str, issue: str, days: int | None = None, today=None) -> list[tuple[str, int]]:
+        """(week, rows with the issue) for one seller, oldest week first."""
+        return self.db.execute("SELECT week, SUM(n) FROM issue_counts WHERE seller=? AND issue=? AND week>=? "
+                               "GROUP BY week ORDER BY week", (seller, issue, self._since(days, today))).fetchall()
+
+    def read_rows(self, seller: str | None = None, since=None, columns: list[str] | None = None):
+        """
+        Raw rows as a DataFrame (with `seller` and `scrape_date` columns),
+        reading only the partitions for `seller` and scrape dates >= `since`.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([("seller", pa.string()), ("scrape_date", pa.string())]),
+                                       flavor="hive")
+        dataset = ds.dataset(self.rows_path, format="parquet", partitioning=partitioning)
+        flt = None
+        if seller is not None:
+            flt = ds.field("seller") == seller
+        if since is not None:
+            cond = ds.field("scrape_date") >= (since if isinstance(since, str) else since.isoformat())
+            flt = cond if flt is None else flt & cond
+        return dataset.to_table(columns=columns, filter=flt).to_pandas()
+
+
+# ========= CLI =========
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query the classified feedback store.")
+    ap.add_argument("--store", default=STORE_PATH, help="store directory")
+    sub = ap.add_subparsers(dest="command", required=True)
+    top = sub.add_parser("top", help="a seller's most frequent issues")
+    top.add_argument("seller")
+    top.add_argument("--days", type=int, default=90, help="look-back window in days (0 = all time)")
+    top.add_argument("-k", type=int, default=10, help="issues to show")
+    top.add_argument("--sentiment", default=None, help="only rows with this final sentiment, e.g. NEGATIVE")
+    sub.add_parser("sellers", help="sellers in the store and their row counts")
+    sub.add_parser("rebuild", help="recompute the aggregate tables from the Parquet rows")
+    args = ap.parse_args(argv)
+
+    store = FeedbackStore(args.store)
+    try:
+        if args.command == "top":
+            start = time.perf_counter()
+            rows = store.top_issues(args.seller, args.days or None, args.k, args.sentiment)
+            took = (time.perf_counter() - start) * 1000
+            window = f"last {args.days} days" if args.days else "all time"
+            print(f"📊 Top issues for {args.seller} ({window}{', ' + args.sentiment if args.sentiment else ''}):")
+            for r in rows:
+                print(f"{r['issue']:<28}{r['count']:>8}{r['share']:>8.1%}")
+            if not rows:
+                print("(no stored rows)")
+            print(f"⏱️ {took:.2f} ms")
+        elif args.command == "sellers":
+            for seller, n in store.sellers():
+                print(f"{seller:<32}{n:>10}")
+        else:
+            n = store.rebuild_aggregates()
+            print(f"🔁 Aggregates rebuilt from {n} stored rows")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import re
+from bisect import bisect_left, bisect_right
+from rapidfuzz import fuzz
+
+NEGATIONS = ("no", "not", "never", "without")
+
+# re.IGNORECASE lets these lowercase letters match ASCII i/s; map them so a
+# plain scan over already-lowered text finds the same occurrences
+_FOLD = str.maketrans({"ı": "i", "ſ": "s"})
+_WORD = re.compile(r"\w")
+_WORDS = re.compile(r"\w+")
+
+
+def _trie_regex(phrases) -> str:
+    """
+    Build an alternation shaped like a trie, so at every position the first
+    successful branch is the longest phrase starting there.
+    """
+    trie = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node) -> str:
+        branches = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return walk(trie)
+
+
+def _max_partial_ratio(m: int) -> float:
+    """Best partial_ratio a non-exact alignment can reach when the shorter string has length m."""
+    return 200 * (m - 1) / (2 * m - 1) if m > 0 else 0.0
+
+
+class TextScan:
+    """Every phrase, negation and boundary hit for one lowered comment."""
+
+    def __init__(self, text: str, present: set[str], negated: set[str]):
+        self.text = text
+        self.present = present
+        self.negated = negated
+
+    def fuzzy_hit(self, kw: str, threshold=95) -> bool:
+        t = self.text
+        if threshold <= 100:
+            if kw in self.present or (t and len(t) <= len(kw) and t in kw):
+                return True
+        # anything short of an exact alignment scores at most this much
+        if t and _max_partial_ratio(min(len(kw), len(t))) < threshold - 1e-7:
+            return False
+        return fuzz.partial_ratio(kw, t) >= threshold
+
+    def keyword_hit(self, kw: str, threshold=95) -> bool:
+        return kw not in self.negated and self.fuzzy_hit(kw, threshold)
+
+    def any_present(self, phrases) -> bool:
+        return not self.present.isdisjoint(phrases)
+
+
+class KeywordMatcher:
+    """
+    Single-pass matcher over ISSUE_KEYWORDS, severity modifiers and positive words.
+    Same answers as calling has_negation_window / fuzzy_hit / `in` per keyword,
+    but one regex scan finds every phrase and negation cue in the text.
+    """
+
+    def __init__(self, issue_keywords: dict[str, list[str]], severe_mods, minor_mods,
+                 positive_words, extra_phrases=(), max_gap=3):
+        self.issue_keywords = {issue: list(kws) for issue, kws in issue_keywords.items()}
+        self.max_gap = max_gap
+        self.keywords = {kw for kws in self.issue_keywords.values() for kw in kws}
+        phrases = (self.keywords | set(severe_mods) | set(minor_mods)
+                   | set(positive_words) | set(extra_phrases) | set(NEGATIONS))
+        phrases.discard("")
+        self._scan = re.compile(f"(?=({_trie_regex(phrases)}))")
+        # a phrase found at some position implies all its phrase-prefixes are there too
+        self._prefixes = {p: [q for q in phrases if p.startswith(q)] for p in phrases}
+
+    def scan(self, text: str) -> TextScan:
+        """`text` should already be lowercased, as the rule helpers do."""
+        found = [(m.start(), m.group(1)) for m in self._scan.finditer(text)]
+        present = {p for _, longest in found for p in self._prefixes[longest]}
+
+        folded = text.translate(_FOLD)
+        if folded != text:
+            found = [(m.start(), m.group(1)) for m in self._scan.finditer(folded)]
+
+        negated = set()
+        if any(longest.startswith(NEGATIONS) for _, longest in found):
+            negated = self._negated(folded, found)
+        return TextScan(text, present, negated)
+
+    def _bounded(self, text: str, start: int, end: int) -> bool:
+        return ((start == 0 or not _WORD.match(text, start - 1))
+                and (end == len(text) or not _WORD.match(text, end)))
+
+    def _negated(self, text: str, found) -> set[str]:
+        occurrences = []
+        cue_ends = []
+        for pos, longest in found:
+            for p in self._prefixes[longest]:
+                if not self._bounded(text, pos, pos + len(p)):
+                    continue
+                if p in NEGATIONS:
+                    cue_ends.append(pos + len(p))
+                if p in self.keywords:
+                    occurrences.append((pos, p))
+        if not cue_ends:
+            return set()
+
+        cue_ends.sort()
+        starts = [w.start() for w in _WORDS.finditer(text)]
+        negated = set()
+        for pos, kw in occurrences:
+            i = bisect_right(cue_ends, pos) - 1
+            if i < 0:
+                continue
+            # word runs strictly between the closest preceding cue and the keyword
+            gap = bisect_left(starts, pos) - bisect_left(starts, cue_ends[i])
+            if gap <= self.max_gap:
+                negated.add(kw)
+        return negated
+
+    def issue_hits(self, scan: TextScan, threshold=95, skip=()) -> set[str]:
+        return {
+            issue for issue, kws in self.issue_keywords.items()
+            if issue not in skip and any(scan.keyword_hit(kw, threshold) for kw in kws)
+        }
@@ -0,0 +1,295 @@
+"""
+Optional instrumentation for a run: per-stage wall / CPU timers, counters
+and latency histograms, written out as a JSON report and, if asked for, a
+Prometheus text-format file (e.g. for node_exporter's textfile collector).
+
+    from RunMetrics import METRICS
+    with METRICS.stage("rules", rows=len(todo)):
+        ...
+    METRICS.count("rule_hits", issue="Wrong item")
+    METRICS.observe("page_load_seconds", 1.7)
+
+METRICS starts disabled: stage() hands back one shared no-op context and
+count() / observe() return on their first line, so the calls can stay in
+place. Per-row timing loops check METRICS.enabled once, outside the loop.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+PROMETHEUS_PREFIX = "review_analysis_"
+# seconds; 1 µs to 100 s in 1 / 2.5 / 5 steps
+LATENCY_BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 2) for m in (1, 2.5, 5)) + (100.0,)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_text(key: tuple) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _prom_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in key + extra]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are read off the bucket bounds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot: above the top bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float, n=1):
+        self.counts[bisect_left(self.buckets, value)] += n
+        self.count += n
+        self.sum += value * n
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (the max, past the top bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+            "buckets": {f"{b:g}": n for b, n in zip(self.buckets, self.counts) if n},
+        }
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "rows", "_wall", "_cpu")
+
+    def __init__(self, metrics, name, rows):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_stage(self.name, time.perf_counter() - self._wall,
+                               time.process_time() - self._cpu, self.rows)
+        return False
+
+
+class _NullStage:
+    """What stage() returns while disabled; `rows` may be set on it and is ignored."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class RunMetrics:
+    """
+    Collects one run's measurements. Thread-safe (the translator and the
+    scraper record from worker threads). CPU time is the whole process's,
+    so stages that overlap in time also overlap in CPU. Stages may nest
+    (model_inference runs inside ai_fallback), so shares can add up past 1.
+
+    A stage given `rows` also feeds `stage_row_seconds{stage=...}`, its
+    wall time per row, weighted by the row count.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._wall0 = time.perf_counter()
+            self._cpu0 = time.process_time()
+            self.stages = {}
+            self.counters = {}
+            self.histograms = {}
+
+    def enable(self):
+        """Start recording from a clean slate."""
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    # ---- recording ----
+    def stage(self, name: str, rows: int | None = None):
+        """Context manager timing one pass through a stage."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def add_stage(self, name: str, wall: float, cpu: float, rows: int | None = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            s = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0})
+            s["calls"] += 1
+            s["wall_s"] += wall
+            s["cpu_s"] += cpu
+            if rows:
+                s["rows"] += rows
+                self._histogram("stage_row_seconds", (("stage", name),)).observe(wall / rows, rows)
+
+    def count(self, name: str, n=1, **labels):
+        if not self.enabled or not n:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def count_many(self, name: str, label: str, counts: dict):
+        """count() once per {label value: n}, under one lock."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for value, n in counts.items():
+                key = (name, ((label, str(value)),))
+                self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(name, _label_key(labels)).observe(value)
+
+    def observe_many(self, name: str, values, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._histogram(name, _label_key(labels))
+            for v in values:
+                h.observe(v)
+
+    def _histogram(self, name: str, key: tuple) -> Histogram:
+        h = self.histograms.get((name, key))
+        if h is None:
+            h = self.histograms[(name, key)] = Histogram()
+        return h
+
+    # ---- output ----
+    def report(self, **context) -> dict:
+        """JSON-ready summary of everything recorded so far."""
+        with self._lock:
+            wall = time.perf_counter() - self._wall0
+            counters = {}
+            for (name, key), v in sorted(self.counters.items()):
+                if key:
+                    counters.setdefault(name, {})[_label_text(key)] = v
+                else:
+                    counters[name] = v
+            histograms = {}
+            for (name, key), h in sorted(self.histograms.items()):
+                histograms.setdefault(name, {})[_label_text(key) or "all"] = h.to_dict()
+            stages = {}
+            for name, s in sorted(self.stages.items(), key=lambda kv: -kv[1]["wall_s"]):
+                stages[name] = {**s, "share_of_run": s["wall_s"] / wall if wall else None,
+                                "us_per_row": s["wall_s"] / s["rows"] * 1e6 if s["rows"] else None}
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "argv": sys.argv,
+                "wall_s": wall,
+                "cpu_s": time.process_time() - self._cpu0,
+                **context,
+                "stages": stages,
+                "counters": counters,
+                "histograms": histograms,
+            }
+
+    def prometheus(self) -> str:
+        """Everything recorded, in the Prometheus text exposition format."""
+        p = PROMETHEUS_PREFIX
+        lines = []
+        with self._lock:
+            for metric, field, help_text in (("stage_wall_seconds_total", "wall_s", "Wall time spent in each stage."),
+                                             ("stage_cpu_seconds_total", "cpu_s", "Process CPU time spent in each stage."),
+                                             ("stage_calls_total", "calls", "Times each stage ran."),
+                                             ("stage_rows_total", "rows", "Rows each stage processed.")):
+                lines += [f"# HELP {p}{metric} {help_text}", f"# TYPE {p}{metric} counter"]
+                lines += [f"{p}{metric}{_prom_labels((('stage', name),))} {s[field]}"
+                          for name, s in sorted(self.stages.items())]
+
+            by_name = {}
+            for (name, key), v in self.counters.items():
+                by_name.setdefault(name, []).append((key, v))
+            for name, series in sorted(by_name.items()):
+                lines.append(f"# TYPE {p}{name}_total counter")
+                lines += [f"{p}{name}_total{_prom_labels(key)} {v}" for key, v in sorted(series)]
+
+            seen = set()
+            for (name, key), h in sorted(self.histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {p}{name} histogram")
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f"{p}{name}_bucket{_prom_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{p}{name}_bucket{_prom_labels(key, (('le', '+Inf'),))} {h.count}")
+                lines.append(f"{p}{name}_sum{_prom_labels(key)} {h.sum}")
+                lines.append(f"{p}{name}_count{_prom_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str | None = None, prometheus_path: str | None = None, **context):
+        """Write the JSON report and/or the Prometheus file (each replaced atomically)."""
+        for path, text in ((json_path, lambda: json.dumps(self.report(**context), indent=2, ensure_ascii=False)),
+                           (prometheus_path, self.prometheus)):
+            if not path:
+                continue
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text())
+            os.replace(tmp, path)
+            print(f"📈 Metrics written to {path}")
+
+
+METRICS = RunMetrics()
+
+
+def add_metrics_args(ap):
+    ap.add_argument("--metrics", default=None, metavar="PATH",
+                    help="record per-stage timings, counters and latency histograms; write a JSON report here")
+    ap.add_argument("--prometheus", default=None, metavar="PATH",
+                    help="also (or only) write the metrics in Prometheus text format here")
+
+
+def start_from_args(args):
+    if args.metrics or args.prometheus:
+        METRICS.enable()
+
+
+def finish_from_args(args, **context):
+    if METRICS.enabled:
+        METRICS.write(args.metrics, args.prometheus, **context)
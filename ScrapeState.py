@@ -0,0 +1,57 @@
+import csv
+import os
+import sqlite3
+import time
+
+SCRAPE_STATE_PATH = "scrape_state.sqlite"
+FEEDBACK_FIELDS = ["feedback_id", "comment", "rating_type", "date"]
+
+
+def feedback_key(entry: dict) -> str:
+    """eBay's feedback id, or the row content for the rare row without one."""
+    return entry.get("feedback_id") or f"{entry['comment']}|{entry['rating_type']}|{entry['date']}"
+
+
+def append_feedback(path: str, rows: list[dict]):
+    """Append rows to the feedback CSV, writing the header if the file is new."""
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FEEDBACK_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+class ScrapeState:
+    """
+    Per-seller scrape progress in SQLite:
+    - seen: every feedback id already saved, so refreshes only append new rows
+    - checkpoints: last page finished by a run that hasn't completed yet
+    """
+
+    def __init__(self, path=SCRAPE_STATE_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (seller TEXT, feedback_id TEXT, "
+                        "PRIMARY KEY (seller, feedback_id))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS checkpoints (seller TEXT PRIMARY KEY, page INTEGER, updated REAL)")
+
+    def seen_ids(self, seller: str) -> set[str]:
+        return {fid for (fid,) in self.db.execute("SELECT feedback_id FROM seen WHERE seller=?", (seller,))}
+
+    def checkpoint(self, seller: str) -> int:
+        """Pages already saved by an interrupted run (0 if the last run finished)."""
+        row = self.db.execute("SELECT page FROM checkpoints WHERE seller=?", (seller,)).fetchone()
+        return row[0] if row else 0
+
+    def save_page(self, seller: str, page: int, ids):
+        """Record a finished page atomically: its ids and the checkpoint move together."""
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?)", [(seller, fid) for fid in ids])
+            self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (seller, page, time.time()))
+
+    def finish(self, seller: str):
+        with self.db:
+            self.db.execute("DELETE FROM checkpoints WHERE seller=?", (seller,))
+
+    def close(self):
+        self.db.close()
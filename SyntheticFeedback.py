@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic eBay feedback for benchmarks and offline runs.
+
+    python SyntheticFeedback.py 100000 -o synthetic.csv --seed 1
+    python SyntheticFeedback.py 100000 --ratings Positive=0.6,Negative=0.3,Neutral=0.1 --languages en=0.8,es=0.2
+
+Rows have the scraper's columns (feedback_id, comment, rating_type, date).
+The mix of ratings, languages, damage phrases, negations and duplicates is
+set by FeedbackMix; the same seed and mix always give the same file.
+"""
+import argparse
+import csv
+import random
+from dataclasses import dataclass, field
+
+POSITIVE_PHRASES = [
+    "great seller", "fast shipping", "A+++", "item as described", "would recommend", "excellent communication",
+    "well packaged", "arrived quickly", "perfect transaction", "good price", "looks like new", "very happy",
+    "great value", "thank you", "smooth transaction", "quick reply", "trustworthy seller", "great condition",
+]
+NEGATIVE_PHRASES = [
+    "arrived late", "wrong item sent", "not what i ordered", "overpriced", "fake", "counterfeit charger",
+    "missing sim tray", "poor service", "no response from seller", "misleading listing", "doesn't work",
+    "won't turn on", "battery faulty", "not as described", "shipping delay", "rude seller",
+]
+NEUTRAL_PHRASES = ["ok", "item received", "as expected", "fine", "average", "took a while", "does the job"]
+DAMAGE_NOUNS = ["scratches", "scuffs", "crack", "chips", "dents", "nicks"]
+DAMAGE_MODS = {"severe": ["deep", "large", "many", "heavy", "excessive"], "minor": ["tiny", "small", "minor", "light", "hairline"]}
+DAMAGE_TEMPLATES = ["{mod} {noun} on the screen", "phone has {mod} {noun}", "{mod} {noun} on the back", "screen cracked"]
+NEGATION_PHRASES = [
+    "no scratches", "not damaged", "never had an issue", "without any problems", "no cracks at all",
+    "not broken", "no scuffs", "not late", "never slow",
+]
+FOREIGN = {
+    "es": ["excelente vendedor", "envío rápido", "producto dañado", "llegó tarde", "muy buena calidad", "no funciona"],
+    "de": ["schneller Versand", "sehr guter Verkäufer", "Artikel beschädigt", "kam zu spät", "funktioniert nicht"],
+    "fr": ["vendeur sérieux", "livraison rapide", "produit endommagé", "arrivé en retard", "ne fonctionne pas"],
+}
+DATES = ["Past month", "Past 6 months", "Past year"]
+
+
+@dataclass
+class FeedbackMix:
+    ratings: dict[str, float] = field(default_factory=lambda: {"Positive": 0.80, "Negative": 0.12, "Neutral": 0.08})
+    languages: dict[str, float] = field(default_factory=lambda: {"en": 0.92, "es": 0.03, "de": 0.03, "fr": 0.02})
+    damage: float = 0.10      # share of English comments with a damage phrase
+    negation: float = 0.10    # share with a negated phrase ("no scratches")
+    duplicates: float = 0.40  # share of rows that exactly repeat an earlier comment
+    variants: float = 0.10    # share that repeat an earlier comment with case/punctuation changes
+    max_phrases: int = 3
+
+
+def _pick(rng: random.Random, weights: dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _english(rng: random.Random, rating: str, mix: FeedbackMix) -> str:
+    pool = {"Positive": POSITIVE_PHRASES, "Negative": NEGATIVE_PHRASES, "Neutral": NEUTRAL_PHRASES}[rating]
+    parts = rng.sample(pool, rng.randint(1, min(mix.max_phrases, len(pool))))
+    if rng.random() < mix.damage:
+        severity = "minor" if rating == "Positive" and rng.random() < 0.7 else "severe"
+        parts.append(rng.choice(DAMAGE_TEMPLATES).format(mod=rng.choice(DAMAGE_MODS[severity]),
+                                                         noun=rng.choice(DAMAGE_NOUNS)))
+    if rng.random() < mix.negation:
+        parts.append(rng.choice(NEGATION_PHRASES))
+    rng.shuffle(parts)
+    text = ", ".join(parts)
+    return text[0].upper() + text[1:]
+
+
+def _variant(rng: random.Random, text: str) -> str:
+    r = rng.random()
+    if r < 0.3:
+        text = text.lower()
+    elif r < 0.5:
+        text = text.upper()
+    if rng.random() < 0.4:
+        text = text.replace(",", "")
+    return text + rng.choice(["", "!", "!!", " :)", " A+++", "."])
+
+
+def generate_feedback(n: int, seed=0, mix: FeedbackMix | None = None):
+    """Yield n feedback dicts; same seed and mix, same rows."""
+    mix = mix or FeedbackMix()
+    rng = random.Random(seed)
+    seen = []
+    for i in range(n):
+        rating = _pick(rng, mix.ratings)
+        r = rng.random()
+        if seen and r < mix.duplicates:
+            comment = rng.choice(seen)
+        elif seen and r < mix.duplicates + mix.variants:
+            comment = _variant(rng, rng.choice(seen))
+        else:
+            lang = _pick(rng, mix.languages)
+            comment = _english(rng, rating, mix) if lang == "en" else rng.choice(FOREIGN[lang])
+            seen.append(comment)
+        yield {"feedback_id": str(10_000_000 + i), "comment": comment, "rating_type": rating, "date": rng.choice(DATES)}
+
+
+def weights(kinds):
+    """argparse type for "a=0.9,b=0.1" weight lists over the given kinds (weights need not sum to 1)."""
+    def parse(text: str) -> dict[str, float]:
+        out = {}
+        for item in text.split(","):
+            name, sep, value = item.partition("=")
+            name = name.strip()
+            if not sep or name not in kinds:
+                raise argparse.ArgumentTypeError(f"expected NAME=WEIGHT pairs with NAME in {', '.join(kinds)}, got {item!r}")
+            try:
+                out[name] = float(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"{value!r} is not a number") from None
+            if out[name] < 0:
+                raise argparse.ArgumentTypeError(f"{name} has a negative weight")
+        if not any(out.values()):
+            raise argparse.ArgumentTypeError("at least one weight must be positive")
+        return out
+    return parse
+
+
+def add_mix_args(ap):
+    """FeedbackMix options, shared by this CLI and Benchmark.py."""
+    d = FeedbackMix()
+    ap.add_argument("--ratings", type=weights(list(d.ratings)), default=d.ratings, metavar="R=W,...",
+                    help="rating weights (default: " + ",".join(f"{k}={v:g}" for k, v in d.ratings.items()) + ")")
+    ap.add_argument("--languages", type=weights(["en", *FOREIGN]), default=d.languages, metavar="L=W,...",
+                    help="language weights (default: " + ",".join(f"{k}={v:g}" for k, v in d.languages.items()) + ")")
+    ap.add_argument("--duplicates", type=float, default=d.duplicates,
+                    help="share of rows repeating an earlier comment exactly")
+    ap.add_argument("--variants", type=float, default=d.variants,
+                    help="share of rows repeating an earlier comment with case/punctuation changes")
+    ap.add_argument("--damage", type=float, default=d.damage, help="share of English comments with a damage phrase")
+    ap.add_argument("--negation", type=float, default=d.negation, help="share with a negated phrase")
+
+
+def mix_from_args(args) -> FeedbackMix:
+    return FeedbackMix(ratings=args.ratings, languages=args.languages, damage=args.damage,
+                       negation=args.negation, duplicates=args.duplicates, variants=args.variants)
+
+
+def write_feedback(path: str, n: int, seed=0, mix: FeedbackMix | None = None) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["feedback_id", "comment", "rating_type", "date"])
+        writer.writeheader()
+        writer.writerows(generate_feedback(n, seed, mix))
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write deterministic synthetic feedback to CSV.")
+    ap.add_argument("rows", type=int)
+    ap.add_argument("-o", "--output", default="synthetic_feedback.csv")
+    ap.add_argument("--seed", type=int, default=0)
+    add_mix_args(ap)
+    args = ap.parse_args(argv)
+    mix = mix_from_args(args)
+    write_feedback(args.output, args.rows, args.seed, mix)
+    print(f"💾 {args.rows} synthetic feedback rows written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,340 @@
+import argparse
 import pandas as pd
-from langdetect import detect
-from deep_translator import GoogleTranslator
+from langdetect import detect, DetectorFactory
+from functools import lru_cache
+import random
+import re
+import sqlite3
+import threading
 import time
 import sys
-def load_language(file='test.csv'):
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ClassificationCache import content_key
+from RunMetrics import METRICS, add_metrics_args, finish_from_args, start_from_args
+
+TRANSLATION_CACHE_PATH = "translation_cache.sqlite"
+
+# langdetect is randomized unless seeded; fix it so reruns agree
+DetectorFactory.seed = 0
+# langdetect loads its language profiles lazily on first use, and threads racing that load get
+# wrong languages or "Need to load profiles"; scraper workers detect concurrently, so take turns
+_DETECT_LOCK = threading.Lock()
+
+# common English / feedback words; an ASCII comment made mostly of these skips langdetect
+ENGLISH_HINTS = frozenset("""
+a about after again all also am an and any are arrived as at awesome bad be been best better box but buy by
+came can condition could day days described description did do does doesn't don't easy everything excellent
+exactly expected fast fine for from gave get good got great had happy has have he highly i i'd i'm if in is
+issue it it's item items just like look looks love many more most much my new nice no not now of ok on one
+only or order ordered other our out packaged packed packaging perfect phone plus price product products
+quality quick quickly really received recommend refund response ruined satisfied say scratches seller sent
+shipped shipping slow smooth so some still super thank thanks that the them there they this thx time to too
+transaction true up us very was way we well went were what when which will with without work works would
+wrong you your
+""".split())
+_ASCII_WORDS = re.compile(r"[a-z']+")
+
+
+# -------- Backends --------
+class TranslatorBackend:
+    """Translates a batch of texts to English. `name` is part of the cache key."""
+    name = "base"
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslatorBackend):
+    name = "google"
+
+    def __init__(self, source="auto", target="en"):
+        self.source = source
+        self.target = target
+        self.name = f"google:{source}:{target}"
+        # GoogleTranslator keeps per-request state on the instance, so one per thread
+        self._local = threading.local()
+
+    def _translator(self):
+        if not hasattr(self._local, "translator"):
+            from deep_translator import GoogleTranslator
+            self._local.translator = GoogleTranslator(source=self.source, target=self.target)
+        return self._local.translator
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        return self._translator().translate_batch(texts)
+
+
+class FakeBackend(TranslatorBackend):
+    """Offline backend for tests: looks texts up in `mapping`, else tags them."""
+    name = "fake"
+
+    def __init__(self, mapping: dict[str, str] | None = None, latency=0.0, fail_every=0):
+        self.mapping = mapping or {}
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            raise ConnectionError("fake backend failure")
+        return [self.mapping.get(t, f"[en] {t}") for t in texts]
+
+
+# -------- Rate limiting --------
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1):
+        """Take n tokens; a cost bigger than one burst is paid in capacity-sized steps."""
+        while n > 0:
+            step = min(n, self.capacity)
+            self._take(step)
+            n -= step
+
+    def _take(self, n: float):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# -------- Persistent cache --------
+class TranslationCache:
+    def __init__(self, path=TRANSLATION_CACHE_PATH):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translated TEXT)")
+
+    def get_many(self, backend: str, texts) -> dict[str, str]:
+        keys = {content_key(backend, t): t for t in texts}
+        found = {}
+        with self._lock:
+            klist = list(keys)
+            for i in range(0, len(klist), 500):
+                chunk = klist[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for k, v in self.db.execute(f"SELECT key, translated FROM translations WHERE key IN ({marks})", chunk):
+                    found[keys[k]] = v
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        METRICS.count("cache_hits", len(found), table="translations")
+        METRICS.count("cache_misses", len(keys) - len(found), table="translations")
+        return found
+
+    def put_many(self, backend: str, translated: dict[str, str]):
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?)",
+                                [(content_key(backend, t), v) for t, v in translated.items()])
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+# -------- Engine --------
+class TranslationEngine:
+    """
+    Translates unique texts in batches over a bounded thread pool.
+    Calls are paced by a token bucket (one token per text) and failed
+    batches are retried with exponential backoff instead of fixed sleeps.
+    """
+
+    def __init__(self, backend: TranslatorBackend | None = None, rate=10.0, concurrency=8, batch_size=20,
+                 retries=4, backoff=0.5, cache: TranslationCache | None = None):
+        self.backend = backend or GoogleBackend()
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.failed = 0
+
+    def _translate_with_retry(self, batch: list[str]) -> list[str] | None:
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire(len(batch))
+            start = time.perf_counter()
+            try:
+                out = self.backend.translate_batch(batch)
+                if len(out) != len(batch):
+                    raise ValueError(f"backend returned {len(out)} results for {len(batch)} texts")
+                METRICS.observe("translation_batch_seconds", time.perf_counter() - start)
+                METRICS.count("translation_batches")
+                return out
+            except Exception as e:
+                METRICS.count("translation_errors")
+                if attempt == self.retries:
+                    print(f"\n⚠️ Translation batch failed after {attempt + 1} attempts: {e}")
+                    return None
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    def translate_many(self, texts) -> dict[str, str]:
+        """{text: translation} for every unique text; texts that kept failing are left out."""
+        unique = list(dict.fromkeys(texts))
+        done = self.cache.get_many(self.backend.name, unique) if self.cache else {}
+        todo = [t for t in unique if t not in done]
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+
+        fresh = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self._translate_with_retry, b): b for b in batches}
+            for fut in as_completed(futures):
+                batch, out = futures[fut], fut.result()
+                if out is None:
+                    self.failed += len(batch)
+                    continue
+                fresh.update(zip(batch, out))
+        if self.cache and fresh:
+            self.cache.put_many(self.backend.name, fresh)
+        METRICS.count("translations", len(fresh))
+        METRICS.count("translation_failures", len(todo) - len(fresh))
+        done.update(fresh)
+        return done
+
+
+# -------- Language detection --------
+def quick_language(text: str) -> str | None:
+    """Cheap pre-check: 'en' for obviously English ASCII text, None when langdetect must decide."""
+    if not text.isascii():
+        return None
+    words = _ASCII_WORDS.findall(text.lower())
+    if not words:
+        return "en"  # "A+++", "5/5", "!!!": nothing to translate
+    hits = sum(w in ENGLISH_HINTS for w in words)
+    return "en" if hits * 2 > len(words) else None
+
+
+@lru_cache(maxsize=200_000)
+def detect_language(text: str) -> str | None:
+    """Language code for one comment, or None if it can't be detected."""
+    lang = quick_language(text)
+    if lang:
+        return lang
+    try:
+        with _DETECT_LOCK:
+            return detect(text)
+    except Exception:
+        return None
+
+
+def detect_languages(texts, progress=False) -> list[str | None]:
+    """detect_language over a column, running each distinct text once."""
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+    langs = {}
+    for i, text in enumerate(unique, start=1):
+        langs[text] = detect_language(text)
+        if progress:
+            sys.stdout.write(f"\rProgress: {round((i / len(unique)) * 100, 2)}%")
+            sys.stdout.flush()
+    return [langs[t] for t in texts]
+
+
+def translate_records(records, engine: TranslationEngine, keep_undetected=False, progress=False) -> list[dict | None]:
+    """
+    The rows with line breaks flattened and non-English comments translated,
+    aligned with the input: None where a row is dropped. Rows whose translation
+    failed are always dropped; rows whose language can't be detected (emoji-only
+    feedback, say) are dropped too unless keep_undetected, which keeps them as-is.
+    """
+    records = [{**row, 'comment': str(row['comment']).replace('\n', ' ').strip()} for row in records]
+
+    # Detect languages first
+    with METRICS.stage("language_detect", rows=len(records)):
+        langs = detect_languages([row['comment'] for row in records], progress=progress)
+    if METRICS.enabled:
+        METRICS.count_many("comments_by_language", "lang", Counter(lang or "unknown" for lang in langs))
+
+    # Translate every distinct non-English comment in one go
+    foreign = [row['comment'] for row, lang in zip(records, langs) if lang not in (None, 'en')]
+    with METRICS.stage("translate", rows=len(foreign)):
+        translations = engine.translate_many(foreign)
+
+    # other columns such as feedback_id/date are kept so the file can be appended to
+    out = []
+    for row, lang in zip(records, langs):
+        if lang is None:
+            out.append(row if keep_undetected else None)
+        elif lang == 'en':
+            out.append(row)
+        elif row['comment'] in translations:
+            out.append({**row, 'comment': translations[row['comment']]})
+        else:
+            out.append(None)
+    return out
+
+
+def load_language(file='test.csv', engine: TranslationEngine | None = None):
     # Load your CSV
-    df = pd.read_csv(file, keep_default_na=False)
-
-    # Clean up line breaks and whitespace
-    df['comment'] = df['comment'].astype(str).str.replace('\n', ' ').str.strip()
-
-    # Translation cache
-    translation_cache = {}
-
-    # Prepare output list
-    translated_rows = []
-
-    # Total number of rows
-    total = len(df)
-    # Loop through each row manually
-    for i, row in enumerate(df.itertuples(index=False), start=1):
-        text = row.comment
-        try:
-            lang = detect(text)
-            if lang == 'en':
-                translated_rows.append({'comment': text, 'rating_type': row.rating_type})
-            else:
-                if text in translation_cache:
-                    translated = translation_cache[text]
-                else:
-                    translated = GoogleTranslator(source='auto', target='en').translate(text)
-                    translation_cache[text] = translated
-                time.sleep(0.1)
-                translated_rows.append({'comment': translated, 'rating_type': row.rating_type})
-        except Exception:
-            pass  # Skip translation errors
-
-        # Update progress
-        progress = round((i / total) * 100, 2)
-        sys.stdout.write(f"\rProgress: {progress}%")
-        sys.stdout.flush()
+    with METRICS.stage("translate_load") as st:
+        df = pd.read_csv(file, keep_default_na=False)
+        st.rows = len(df)
+
+    own_engine = engine is None
+    if own_engine:
+        engine = TranslationEngine(cache=TranslationCache())
+
+    # rows that can't be detected are skipped, as before
+    translated_rows = [row for row in translate_records(df.to_dict('records'), engine, progress=True) if row]
+
+    if engine.failed:
+        print(f"\n⚠️ {engine.failed} comments could not be translated and were skipped")
+    if engine.cache:
+        print(f"\n🗃️ Translation cache: {engine.cache.hits} hits / {engine.cache.misses} misses")
+        if own_engine:
+            engine.cache.close()
 
     # Convert to DataFrame
     translated_df = pd.DataFrame(translated_rows)
 
     # Save to output file
-    translated_df.to_csv(file, index=False)
+    with METRICS.stage("translate_write", rows=len(translated_df)):
+        translated_df.to_csv(file, index=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Translate a feedback CSV's comments to English in place.")
+    ap.add_argument("file", nargs="?", default="test.csv", help="CSV with a comment column")
+    ap.add_argument("--rate", type=float, default=10.0, help="texts per second sent to the translator")
+    ap.add_argument("--concurrency", type=int, default=8, help="translation batches in flight")
+    ap.add_argument("--batch-size", type=int, default=20, help="texts per translation request")
+    ap.add_argument("--no-cache", action="store_true", help=f"don't read or write {TRANSLATION_CACHE_PATH}")
+    add_metrics_args(ap)
+    args = ap.parse_args(argv)
+
+    start_from_args(args)
+    engine = TranslationEngine(rate=args.rate, concurrency=args.concurrency, batch_size=args.batch_size,
+                               cache=None if args.no_cache else TranslationCache())
+    try:
+        load_language(args.file, engine)
+    finally:
+        if engine.cache:
+            engine.cache.close()
+    print(f"\n✅ Translated {args.file}")
+    finish_from_args(args, file=args.file)
 
 
+if __name__ == "__main__":
+    main()
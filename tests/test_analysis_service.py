@@ -0,0 +1,79 @@
+import socket
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import AIAnalysis
+from AnalysisService import MAX_BODY_BYTES, AnalysisServer, MicroBatcher, analyze_reviews
+from ClassificationCache import ClassificationCache
+
+
+def cached_results(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_cache_is_trimmed_while_the_service_runs(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    made = []
+
+    def make_analyzer():  # built on the analyzer thread, which owns the SQLite connection
+        made.append(AIAnalysis.ReviewAnalyzer(use_ai=False, cache=ClassificationCache(path, "rules", max_entries=5)))
+        return made[0]
+
+    batcher = MicroBatcher(make_analyzer, max_batch=1, max_wait_ms=0, evict_every=2)
+    batcher.start()
+    try:
+        for i in range(20):
+            (fut,) = batcher.submit([(f"item {i} arrived broken", "Negative")])
+            assert fut.result(timeout=30)["issues"]
+        # the trim after the 20th batch runs just after its result is handed back
+        deadline = time.monotonic() + 5
+        while cached_results(path) > 5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cached_results(path) == 5
+        assert made[0].cache.stats["results_evicted"] == 16  # 20 reviews + the warm-up, less 5
+    finally:
+        batcher.stop()
+
+
+def test_filler_comments_get_the_blank_comment_answer():
+    analyzer = AIAnalysis.ReviewAnalyzer(use_ai=False)
+    out = analyze_reviews(analyzer, [("ok", "Positive"), (" Fine ", "Negative"), ("", "Neutral"),
+                                     ("screen arrived cracked", "Positive")])
+    assert [(r["comment"], r["issues"], r["final_sentiment"]) for r in out[:3]] == [
+        ("ok", [], "POSITIVE"), (" Fine ", [], "NEGATIVE"), ("", [], "NEUTRAL")]
+    assert out[3]["issues"]
+
+
+@pytest.fixture
+def server():
+    srv = AnalysisServer(("127.0.0.1", 0), MicroBatcher(lambda: None))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv.server_address
+    srv.shutdown()
+    srv.server_close()
+
+
+def raw_post(address, headers: str, body=b"") -> bytes:
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(f"POST /analyze HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode() + body)
+        chunks = []
+        while chunk := sock.recv(65536):  # returns b"" only once the server closes the connection
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def test_bad_content_length_is_a_400(server):
+    reply = raw_post(server, "Content-Length: abc\r\n", b'{"comment": "ok"}')
+    assert reply.startswith(b"HTTP/1.1 400")
+    assert b"Connection: close" in reply
+
+
+def test_oversized_body_closes_the_connection(server):
+    reply = raw_post(server, f"Content-Length: {MAX_BODY_BYTES + 1}\r\n", b"x" * 1024)
+    assert reply.startswith(b"HTTP/1.1 413")
+    assert reply.count(b"HTTP/1.1") == 1
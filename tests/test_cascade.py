@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import AIAnalysis
+from Benchmark import StubZeroShot
+from SyntheticFeedback import FeedbackMix, generate_feedback
+
+# more low ratings and damage than real feedback, so every sentiment path is exercised
+MIX = FeedbackMix(ratings={"Positive": 0.5, "Negative": 0.3, "Neutral": 0.2}, damage=0.3, negation=0.2)
+EXTRA = [
+    ("Item not as described, listing was misleading", "Neutral"),
+    ("Great seller but the box was crushed", "Positive"),
+    ("Works fine, thanks", "Negative"),
+    ("Never arrived, seller refunded quickly", "Neutral"),
+    ("Screen cracked but seller was helpful", "Positive"),
+    ("", "Negative"),
+]
+
+
+def analyzer(cascade: bool) -> AIAnalysis.ReviewAnalyzer:
+    a = AIAnalysis.ReviewAnalyzer(cascade=cascade)
+    a._zsc = StubZeroShot(batch_ms=0, pair_ms=0)
+    return a
+
+
+@pytest.fixture(scope="module")
+def feedback():
+    rows = [(r["comment"], r["rating_type"]) for r in generate_feedback(3000, seed=7, mix=MIX)] + EXTRA
+    df = pd.DataFrame(rows, columns=["comment", "rating_type"])
+    return AIAnalysis.prepare_feedback(df)
+
+
+def test_cascade_keeps_every_final_sentiment(feedback):
+    full, cascade = analyzer(False), analyzer(True)
+    expected = full.classify(feedback)
+    got = cascade.classify(feedback)
+    assert list(got["final_sentiment"].astype(str)) == list(expected["final_sentiment"].astype(str))
+    # and it did skip model work: rows decided by rules, or settled on their candidate labels
+    assert cascade.stats["cascade_rules_decided"] and cascade.stats["cascade_below_min_conf"]
+    assert cascade.zsc.pairs < full.zsc.pairs
+
+
+def test_candidate_memo_matches_a_fresh_computation(feedback, monkeypatch):
+    # the memo is keyed on what finalize_issues / override_sentiment read; a cold memo must agree with a warm one
+    a = analyzer(True)
+    warm = a.classify(feedback)
+    monkeypatch.setattr(AIAnalysis, "_candidates", {})
+    cold = analyzer(True).classify(feedback.iloc[::-1]).iloc[::-1]
+    assert list(cold["final_sentiment"].astype(str)) == list(warm["final_sentiment"].astype(str))
+    assert list(cold["issue_mask"]) == list(warm["issue_mask"])
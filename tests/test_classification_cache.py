@@ -0,0 +1,26 @@
+import sqlite3
+
+from ClassificationCache import ClassificationCache
+
+RESULT = (["Damaged item"], ["Damaged item"], "NEGATIVE")
+
+
+def test_lookups_do_not_hold_the_write_lock(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = ClassificationCache(path, "model")
+    first.put_results({("screen cracked", "Negative"): RESULT}, "v1")
+    first.put_scores({"screen cracked": {"Damaged item": 0.9}})
+    # lookups where every key hits only touch `used`
+    assert first.get_results([("screen cracked", "Negative")], "v1") == {("screen cracked", "Negative"): RESULT}
+    assert first.get_scores(["screen cracked"]) == {"screen cracked": {"Damaged item": 0.9}}
+
+    second = ClassificationCache(path, "model")
+    second.db.execute("PRAGMA busy_timeout = 200")  # fail fast instead of after sqlite3's default 5 s
+    try:
+        second.put_results({("late", "Neutral"): ([], [], "NEUTRAL")}, "v1")
+        second.put_scores({"late": {"Damaged item": 0.1}})
+    except sqlite3.OperationalError as e:
+        raise AssertionError(f"the first cache still holds the write lock: {e}")
+    assert second.get_results([("screen cracked", "Negative")], "v1") == {("screen cracked", "Negative"): RESULT}
+    second.close()
+    first.close()
@@ -0,0 +1,52 @@
+from collections import Counter
+
+import pandas as pd
+
+import AIAnalysis
+
+ROWS = [
+    (["Wrong item", "Damaged product (severe)"], "NEGATIVE"),
+    (["Wrong item"], "NEGATIVE"),
+    (["Wrong item"], "NEGATIVE"),
+    (["Good product", "Fast delivery"], "POSITIVE"),
+    ([], "POSITIVE"),
+    ([], "NEUTRAL"),
+    (["Late delivery"], "NEUTRAL"),
+    (["Late delivery"], "POSITIVE"),
+    (["Great communication", "Late delivery", "Wrong item"], "NEGATIVE"),
+    (["Damaged product (severe)"], ""),  # rating-derived sentiment of a blank rating
+    (AIAnalysis.ISSUE_LABELS, "NEGATIVE"),
+]
+
+
+def fixture_frame(repeat=3):
+    issues, sentiments = zip(*(ROWS * repeat))
+    return pd.DataFrame({"issues": list(issues), "final_sentiment": list(sentiments)})
+
+
+def explode_counts(df) -> Counter:
+    """The summary the way it used to be computed: one row per (row, issue), then groupby."""
+    sizes = df.explode("issues").groupby(["issues", "final_sentiment"]).size()
+    return Counter({key: int(n) for key, n in sizes.items()})
+
+
+def with_masks(df):
+    out = df.drop(columns="issues")
+    out["issue_mask"] = [AIAnalysis.encode_issues(i) for i in df["issues"]]
+    out["final_sentiment"] = pd.Categorical(out["final_sentiment"],
+                                            categories=AIAnalysis.SENTIMENTS + [""])
+    return out
+
+
+def test_count_issues_matches_explode_groupby():
+    df = fixture_frame()
+    assert AIAnalysis.count_issues(with_masks(df)) == explode_counts(df)
+
+
+def test_count_issues_accumulates_over_chunks():
+    df = fixture_frame()
+    counts = Counter()
+    for start in range(0, len(df), 4):
+        AIAnalysis.count_issues(with_masks(df.iloc[start:start + 4]), counts)
+    assert counts == explode_counts(df)
+    assert AIAnalysis.count_issues(with_masks(df.iloc[:0])) == Counter()
@@ -0,0 +1,50 @@
+import hashlib
+
+import numpy as np
+
+from EmbeddingClassifier import EmbeddingClassifier, mean_pool
+
+DIM = 8
+
+
+def word_vector(word: str) -> np.ndarray:
+    seed = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+
+
+class FakeEncoder(EmbeddingClassifier):
+    """Pads each batch to its longest text and fills the pad positions with junk, like a real encoder."""
+
+    def _forward(self, batch):
+        tokens = [t.split() for t in batch]
+        width = max(map(len, tokens))
+        hidden = np.full((len(batch), width, DIM), 7.0, dtype=np.float32)
+        mask = np.zeros((len(batch), width), dtype=np.int64)
+        for r, words in enumerate(tokens):
+            hidden[r, :len(words)] = [word_vector(w) for w in words]
+            mask[r, :len(words)] = 1
+        return hidden, mask
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+    assert np.allclose(mean_pool(hidden, np.array([[1, 1, 0]])), [[2.0, 3.0]])
+    # a row that is all padding pools to zeros instead of dividing by zero
+    assert np.allclose(mean_pool(hidden, np.array([[0, 0, 0]])), [[0.0, 0.0]])
+
+
+def test_vector_does_not_depend_on_the_rest_of_the_batch():
+    clf = FakeEncoder(["Wrong item"], {}, batch_size=4, label_cache=None)
+    alone = clf.embed(["screen cracked"])[0]
+    batched = clf.embed(["screen cracked", "arrived late and the box was crushed flat", "ok"])
+    assert np.allclose(batched[0], alone, atol=1e-6)
+    expected = (word_vector("screen") + word_vector("cracked")) / 2
+    assert np.allclose(alone, expected / np.linalg.norm(expected), atol=1e-6)
+
+
+def test_embed_keeps_input_order_across_batches():
+    clf = FakeEncoder(["Wrong item"], {}, batch_size=2, label_cache=None)
+    texts = ["a b c d e", "x", "late box", "one two three", "q"]
+    together = clf.embed(texts)
+    for text, row in zip(texts, together):
+        assert np.allclose(row, clf.embed([text])[0], atol=1e-6)
@@ -0,0 +1,30 @@
+import os
+
+from FeedbackParser import parse_feedback_rows
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parses_saved_feedback_page():
+    rows = parse_feedback_rows(load_fixture("feedback_page.html"))
+    assert rows == [
+        {"feedback_id": "2401001", "comment": "Great seller, fast shipping A+++",
+         "rating_type": "Positive", "date": "Past month"},
+        {"feedback_id": "2401002", "comment": "Screen cracked, doesn’t turn on",
+         "rating_type": "Negative", "date": "Past 6 months"},
+        {"feedback_id": "2401003", "comment": "Envío rápido, pero caja dañada 👍",
+         "rating_type": "Neutral", "date": "Past year"},
+        # no card__comment span (the class must match as a whole word) and no "Past ..." label
+        {"feedback_id": "2401004", "comment": "", "rating_type": "Positive", "date": "Unknown"},
+        {"feedback_id": "2401005", "comment": "👍👍", "rating_type": "Unknown", "date": "Past month"},
+    ]
+
+
+def test_empty_page_has_no_rows():
+    assert parse_feedback_rows("") == []
+    assert parse_feedback_rows("<html><body><p>No feedback yet</p></body></html>") == []
@@ -0,0 +1,81 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import FeedbackStore as fs
+
+pytest.importorskip("pyarrow")
+
+LABELS = ["Damaged item", "Late delivery", "Wrong item"]
+
+
+def classified(ids, masks, sentiments):
+    return pd.DataFrame({
+        "feedback_id": ids,
+        "comment": [f"comment {i}" for i in ids],
+        "rating_type": ["Negative"] * len(ids),
+        "date": ["Past month"] * len(ids),
+        "issue_mask": masks,
+        "final_sentiment": sentiments,
+    })
+
+
+def parquet_files(store):
+    return sorted(os.path.relpath(os.path.join(root, n), store.rows_path)
+                  for root, _, files in os.walk(store.rows_path) for n in files)
+
+
+def test_opens_during_an_append_leave_its_files_alone(tmp_path, monkeypatch):
+    path = str(tmp_path / "store")
+    writer = fs.FeedbackStore(path, LABELS)
+    real_replace = os.replace
+    opened = []
+
+    def replace_after_other_opens(src, dst):
+        # another process opens the store while this append is between its write and its commit
+        for labels in (None, LABELS):
+            other = fs.FeedbackStore(path, labels)
+            opened.append(parquet_files(other))
+            other.close()
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(fs.os, "replace", replace_after_other_opens)
+    assert writer.append(classified(["1", "2", "3"], [0b001, 0b101, 0], ["NEGATIVE"] * 3), "seller", "2025-08-11") == 3
+    monkeypatch.undo()
+
+    assert len(opened) == 2 and all(len(files) == 1 for files in opened)
+    assert writer.rebuild_aggregates() == 3
+    assert writer.top_issues("seller", None) == [
+        {"issue": "Damaged item", "count": 2, "share": 2 / 3},
+        {"issue": "Wrong item", "count": 1, "share": 1 / 3},
+    ]
+    writer.close()
+
+
+def test_writer_sweeps_only_abandoned_files(tmp_path):
+    path = str(tmp_path / "store")
+    store = fs.FeedbackStore(path, LABELS)
+    store.append(classified(["1"], [0b010], ["NEGATIVE"]), "seller", "2025-08-11")
+    committed = parquet_files(store)
+    store.close()
+
+    part_dir = os.path.join(path, "rows", "seller=seller", "scrape_date=2025-08-11")
+    stale = [os.path.join(part_dir, ".part-old.parquet"), os.path.join(part_dir, "part-orphan.parquet")]
+    fresh = [os.path.join(part_dir, ".part-new.parquet"), os.path.join(part_dir, "part-renamed.parquet")]
+    for p in stale + fresh:
+        with open(p, "wb") as f:
+            f.write(b"PAR1")
+    hours_ago = time.time() - 2 * fs.SWEEP_GRACE
+    for p in stale:
+        os.utime(p, (hours_ago, hours_ago))
+
+    reader = fs.FeedbackStore(path)
+    assert len(parquet_files(reader)) == 5  # read-only opens never delete
+    reader.close()
+
+    writer = fs.FeedbackStore(path, LABELS)
+    left = parquet_files(writer)
+    writer.close()
+    assert left == sorted(committed + [os.path.relpath(p, os.path.join(path, "rows")) for p in fresh])
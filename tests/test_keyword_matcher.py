@@ -0,0 +1,128 @@
+"""
+The compiled KeywordMatcher must tag exactly like the original loop that ran
+has_negation_window + fuzzy_hit once per keyword.
+"""
+import random
+import re
+
+import pytest
+
+import AIAnalysis as A
+
+
+# ---- the per-keyword implementation MATCHER replaced ----
+def reference_damage(text: str, original_rating: str) -> str | None:
+    t = text.lower()
+    any_damage_word = any(not A.has_negation_window(t, kw) and A.fuzzy_hit(t, kw)
+                          for kw in A.ISSUE_KEYWORDS["Damaged product"])
+    if not any_damage_word:
+        return None
+    severe_hint = any(mod in t for mod in A.SEVERE_MODS)
+    if any(w in t for w in A.SEVERE_DAMAGE_WORDS):
+        severe_hint = True
+    if original_rating.lower() == "positive" and not severe_hint:
+        return None
+    return "Damaged product (severe)" if severe_hint else "Damaged product"
+
+
+def reference_rules(text: str, original_rating: str, threshold=95) -> list[str]:
+    t = text.lower()
+    issues = set()
+    dmg = reference_damage(text, original_rating)
+    if dmg:
+        issues.add(dmg)
+    for issue, kws in A.ISSUE_KEYWORDS.items():
+        if issue.startswith("Damaged product"):
+            continue
+        for kw in kws:
+            if A.has_negation_window(t, kw):
+                continue
+            if A.fuzzy_hit(t, kw, threshold=threshold):
+                issues.add(issue)
+                break
+    if "Accurate description" in issues and "Misleading description" in issues:
+        if re.search(r"\bmisleading\b|\bnot as described\b|\bdescription (?:not|isn't|isn’t) accurate\b", t):
+            issues.discard("Accurate description")
+        else:
+            issues.discard("Misleading description")
+    if any(pw in t for pw in A.POSITIVE_WORDS):
+        issues.add("Good product")
+    return sorted(issues)
+
+
+# ---- corpus ----
+KEYWORDS = sorted({kw for kws in A.ISSUE_KEYWORDS.values() for kw in kws})
+MODS = sorted(A.SEVERE_MODS | A.MINOR_MODS)
+FILLER = ["the", "phone", "arrived", "and", "it", "was", "really", "item", "seller", "a", "bit", "overall"]
+NEGATED = ["no {kw}", "not {kw}", "never any {kw}", "without {kw}", "no real {kw} at all",
+           "not a single {kw}", "there was no, {kw}", "nothing {kw}", "knot {kw}"]
+UNICODE = ["İ", "ı", "ſ", "ß", "é", "Ü", "ﬁ", "K", "’", "“", "—", "👍"]
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    op = rng.choice("dswi")
+    if op == "d":
+        return word[:i] + word[i + 1:]
+    if op == "s":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if op == "w":
+        return word[:i] + rng.choice("aeiou") + word[i + 1:]
+    return word[:i] + rng.choice("xyz") + word[i:]
+
+
+def _case(rng: random.Random, text: str) -> str:
+    r = rng.random()
+    if r < 0.2:
+        return text.upper()
+    if r < 0.35:
+        return text.title()
+    return text
+
+
+def corpus(n=2500, seed=0) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        parts = rng.sample(FILLER, rng.randint(0, 3))
+        for _ in range(rng.randint(1, 3)):
+            kw = rng.choice(KEYWORDS)
+            style = rng.random()
+            if style < 0.3:
+                parts.append(rng.choice(NEGATED).format(kw=kw))
+            elif style < 0.55:
+                parts.append(" ".join(_typo(rng, w) for w in kw.split()))
+            elif style < 0.7:
+                parts.append(f"{rng.choice(MODS)} {kw}")
+            else:
+                parts.append(kw)
+        if rng.random() < 0.3:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(UNICODE))
+        rng.shuffle(parts)
+        texts.append((_case(rng, rng.choice([" ", ", ", ". ", "! "]).join(parts)),
+                      rng.choice(["Positive", "Negative", "Neutral"])))
+    # hand-picked edge cases
+    texts += [(t, r) for t in ["No scratches!", "NOT BROKEN", "never any delay", "without scuffs, works fine",
+                               "ScRaTcHeS everywhere", "İtem arrıved late", "ſcratches", "Straße, cracked screen",
+                               "tiny scratch", "hairline crack", "not as described but accurate description",
+                               "", "!!!", "no", "delayed delayed not delayed"]
+              for r in ("Positive", "Negative")]
+    return texts
+
+
+CORPUS = corpus()
+
+
+@pytest.mark.parametrize("threshold", [95, 90, 80])
+def test_matcher_matches_per_keyword_loop(threshold):
+    mismatches = [(text, rating, got, want) for text, rating in CORPUS
+                  if (got := A.match_issues_rule_based(text, rating, threshold))
+                  != (want := reference_rules(text, rating, threshold))]
+    assert not mismatches, mismatches[:5]
+
+
+def test_damage_severity_matches_reference():
+    for text, rating in CORPUS:
+        assert A.detect_damage_with_severity(text, rating) == reference_damage(text, rating), text
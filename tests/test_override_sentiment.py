@@ -0,0 +1,25 @@
+from itertools import combinations, product
+
+import AIAnalysis
+
+# one label from each group the decision ladder looks at, plus duplicates and order changes
+LABELS = ["Wrong item", "Damaged product (severe)", "Good product", "Late delivery", "Overpriced"]
+ISSUE_SETS = ([list(c) for n in range(len(LABELS) + 1) for c in combinations(LABELS, n)]
+              + [["Late delivery", "Late delivery"], ["Good product", "Wrong item"]])
+COMMENTS = ["", "Arrived late", "Great seller", "LOOKS NEW, thanks", "not great, box crushed",
+            "fast shipping but wrong item", "Écran cassé", "smooth transaction 👍"]
+RATINGS = ["Positive", "Negative", "Neutral", "positive", "NEGATIVE", ""]
+
+
+def test_bulk_matches_the_scalar_ladder():
+    assert set(LABELS) <= set(AIAnalysis.ISSUE_LABELS)
+    rows = list(product(COMMENTS, ISSUE_SETS, RATINGS))
+    comments, issues, ratings = map(list, zip(*rows))
+    expected = [AIAnalysis.override_sentiment(c, i, r) for c, i, r in rows]
+    assert list(AIAnalysis.override_sentiment_bulk(comments, issues, ratings)) == expected
+    # every branch of the ladder is reached
+    assert set(expected) == {"POSITIVE", "NEGATIVE", "NEUTRAL", ""}
+
+
+def test_bulk_on_empty_columns():
+    assert len(AIAnalysis.override_sentiment_bulk([], [], [])) == 0
@@ -0,0 +1,189 @@
+import csv
+import functools
+import os
+import re
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+import pytest
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import CombinedFeedback as cf
+import TranslateFeedback as tf
+from ScrapeState import ScrapeState
+
+STANDIN = os.path.join(os.path.dirname(__file__), "fixtures", "standin")
+# the few CSS selectors the scraper uses, as XPath (lxml has no CSS engine without cssselect)
+CSS = {
+    "tr[data-feedback-id]": "//tr[@data-feedback-id]",
+    "button[aria-label*='Click to show 200 feedback ratings per page']":
+        "//button[contains(@aria-label, 'Click to show 200 feedback ratings per page')]",
+}
+ONCLICK_HREF = re.compile(r"location\.href\s*=\s*'([^']+)'")
+
+
+class FakeElement:
+    def __init__(self, driver, el):
+        self.driver = driver
+        self.el = el
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return self.el.get("disabled") is None
+
+    def get_attribute(self, name):
+        value = self.el.get(name)
+        return urljoin(self.driver.current_url, value) if name == "href" and value else value
+
+    def click(self):
+        if self.el.get("id") == "next-page" and self.driver.fail_next_page:
+            raise ConnectionError("next page request failed")
+        href = self.el.get("href") or (ONCLICK_HREF.findall(self.el.get("onclick", "")) or [None])[0]
+        if href and self.is_enabled():
+            self.driver.get(urljoin(self.driver.current_url, href))
+
+
+class FakeDriver:
+    """The slice of the WebDriver API the scraper uses, backed by plain HTTP GETs."""
+    created = []
+    fail_next_page = False  # every click on #next-page fails while set
+
+    def __init__(self, headless=True):
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self.tree = None
+        self.gets = []
+        self.quit_called = False
+        FakeDriver.created.append(self)
+
+    def get(self, url):
+        self.gets.append(url)
+        with urlopen(url) as resp:
+            self.current_url = resp.url
+            self.page_source = resp.read().decode("utf-8")
+        self.tree = lxml_html.fromstring(self.page_source)
+
+    def find_elements(self, by, value):
+        if by == By.ID:
+            xpath = f"//*[@id='{value}']"
+        elif by == By.CSS_SELECTOR:
+            xpath = CSS[value]
+        else:
+            xpath = value
+        return [FakeElement(self, el) for el in self.tree.xpath(xpath)] if self.tree is not None else []
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+    def execute_script(self, script, *args):
+        if "document.readyState" in script:
+            return "complete"
+        if "data-feedback-id" in script:
+            rows = self.find_elements(By.CSS_SELECTOR, "tr[data-feedback-id]")
+            return rows[0].get_attribute("data-feedback-id") if rows else None
+        if "click()" in script:
+            return args[0].click()
+        raise NotImplementedError(script)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def standin_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=STANDIN))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper(standin_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # scrape_state.sqlite / translation_cache.sqlite
+    monkeypatch.setattr(cf, "EBAY_BASE", standin_server)
+    monkeypatch.setattr(cf, "create_driver", FakeDriver)
+    monkeypatch.setattr(cf, "TranslationEngine", lambda cache=None: tf.TranslationEngine(tf.FakeBackend(), rate=1000))
+    FakeDriver.created = []
+    return standin_server
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_scrape_many_with_two_workers(scraper, tmp_path):
+    product_url = f"{scraper}/itm/1001"
+    targets = ["seller_a", "seller_b", product_url]
+    out = tmp_path / "feedback"
+
+    results = cf.scrape_many(targets, workers=2, headless=True, output_dir=str(out))
+
+    assert results == {"seller_a": 42, "seller_b": 28, product_url: 27}
+    assert len(FakeDriver.created) == 2
+    assert all(d.quit_called for d in FakeDriver.created)
+    # the product page resolved through the store to seller_c's sorted feedback profile
+    assert any("/fdbk/feedback_profile/seller_c" in url and "sort=RecentV2" in url
+               for d in FakeDriver.created for url in d.gets)
+
+    rows = {seller: read_rows(out / f"{seller}.csv") for seller in ("seller_a", "seller_b", "seller_c")}
+    assert {s: len(r) for s, r in rows.items()} == {"seller_a": 42, "seller_b": 28, "seller_c": 27}
+    a = rows["seller_a"]
+    assert [r["feedback_id"] for r in a] == [f"a{n}" for n in range(1000, 958, -1)]
+    assert a[0] == {"feedback_id": "a1000", "comment": "Great seller, fast shipping",
+                    "rating_type": "Positive", "date": "Past month"}
+    # translated as each page was saved; emoji-only feedback kept as scraped
+    assert a[3]["comment"] == "[en] El producto llegó roto y el vendedor no responde"
+    assert a[3]["rating_type"] == "Negative"
+    assert a[7]["comment"] == "👍👍"
+    assert a[11]["rating_type"] == "Neutral"
+
+
+def test_rerun_adds_nothing_and_stops_at_the_first_page(scraper, tmp_path):
+    out = tmp_path / "feedback"
+    targets = ["seller_a", "seller_b"]
+    cf.scrape_many(targets, workers=2, headless=True, output_dir=str(out))
+    before = {p.name: p.read_bytes() for p in out.iterdir()}
+    FakeDriver.created = []
+
+    assert cf.scrape_many(targets, workers=2, headless=True, output_dir=str(out)) == {"seller_a": 0, "seller_b": 0}
+    assert {p.name: p.read_bytes() for p in out.iterdir()} == before
+    # seller_a's second 200-row page is never requested
+    assert not any(url.endswith("200-2.html") for d in FakeDriver.created for url in d.gets)
+
+
+def test_failed_pagination_keeps_the_checkpoint(scraper, tmp_path, monkeypatch):
+    out = tmp_path / "feedback"
+    monkeypatch.setattr(FakeDriver, "fail_next_page", True)
+    # seller_a's first 200-row page is saved, then every click on "next" fails
+    assert cf.scrape_many(["seller_a"], workers=1, headless=True, output_dir=str(out)) == {"seller_a": 30}
+    assert ScrapeState().checkpoint("seller_a") == 1
+
+    monkeypatch.setattr(FakeDriver, "fail_next_page", False)
+    # the next run walks past page 1 instead of stopping on it, and fetches the rest
+    assert cf.scrape_many(["seller_a"], workers=1, headless=True, output_dir=str(out)) == {"seller_a": 12}
+    assert ScrapeState().checkpoint("seller_a") == 0
+    assert len(read_rows(out / "seller_a.csv")) == 42
+
+
+def test_single_target_run_leaves_test_csv_for_the_analysis(scraper, tmp_path):
+    out = tmp_path / "feedback"
+    cf.main(["seller_b", "--output-dir", str(out), "--base-url", scraper])
+    assert (tmp_path / cf.CSV_PATH).read_bytes() == (out / "seller_b.csv").read_bytes()
+    assert len(read_rows(tmp_path / cf.CSV_PATH)) == 28
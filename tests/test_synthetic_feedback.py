@@ -0,0 +1,35 @@
+import csv
+import dataclasses
+
+import pytest
+
+import Benchmark
+import SyntheticFeedback as sf
+
+
+def test_cli_mix_sets_ratings_and_languages(tmp_path):
+    out = tmp_path / "synthetic.csv"
+    sf.main(["500", "-o", str(out), "--ratings", "Negative=1", "--languages", "es=0.5,fr=0.5",
+             "--duplicates", "0", "--variants", "0"])
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 500
+    assert {r["rating_type"] for r in rows} == {"Negative"}
+    assert {r["comment"] for r in rows} <= set(sf.FOREIGN["es"] + sf.FOREIGN["fr"])
+
+
+def test_benchmark_records_the_mix_it_was_given():
+    args = Benchmark.parse_args(["--ratings", "Positive=0.5,Neutral=0.5", "--languages", "en=0.9,de=0.1",
+                                 "--variants", "0.3"])
+    mix = dataclasses.asdict(args.mix)
+    assert mix["ratings"] == {"Positive": 0.5, "Neutral": 0.5}
+    assert mix["languages"] == {"en": 0.9, "de": 0.1}
+    assert mix["variants"] == 0.3
+    assert dataclasses.asdict(Benchmark.parse_args([]).mix) == dataclasses.asdict(sf.FeedbackMix())
+
+
+@pytest.mark.parametrize("value", ["Great=1", "Positive", "Positive=x", "Positive=-1", "Positive=0"])
+def test_bad_weights_are_rejected(value, capsys):
+    with pytest.raises(SystemExit):
+        sf.main(["10", "--ratings", value])
+    assert "--ratings" in capsys.readouterr().err
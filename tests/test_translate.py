@@ -0,0 +1,86 @@
+import time
+
+import TranslateFeedback as tf
+
+
+def test_token_bucket_charges_every_text_when_batches_exceed_capacity():
+    # capacity is max(1, rate) = 100 tokens, smaller than one 200-text batch
+    engine = tf.TranslationEngine(tf.FakeBackend(), rate=100, concurrency=4, batch_size=200)
+    texts = [f"texto {i}" for i in range(250)]
+    start = time.monotonic()
+    out = engine.translate_many(texts)
+    elapsed = time.monotonic() - start
+    assert len(out) == 250
+    # 100 tokens of burst, then 150 more at 100/s
+    assert elapsed >= 1.3
+
+
+def test_token_bucket_allows_the_initial_burst():
+    bucket = tf.TokenBucket(rate=10)
+    start = time.monotonic()
+    bucket.acquire(10)
+    assert time.monotonic() - start < 0.1
+
+
+class FailingBackend(tf.FakeBackend):
+    def translate_batch(self, texts):
+        if any("roto" in t for t in texts):
+            raise RuntimeError("backend down")
+        return super().translate_batch(texts)
+
+
+def test_translate_records_keeps_undetectable_rows_when_asked():
+    engine = tf.TranslationEngine(FailingBackend({"Sehr gut, danke schön": "Very good, thank you"}),
+                                  rate=1000, batch_size=1, retries=0)
+    rows = [
+        {"feedback_id": "1", "comment": "Great seller\nfast shipping"},
+        {"feedback_id": "2", "comment": "👍👍"},
+        {"feedback_id": "3", "comment": "Sehr gut, danke schön"},
+        {"feedback_id": "4", "comment": "El producto llegó roto y nadie responde"},
+    ]
+    assert tf.translate_records(rows, engine, keep_undetected=True) == [
+        {"feedback_id": "1", "comment": "Great seller fast shipping"},
+        {"feedback_id": "2", "comment": "👍👍"},
+        {"feedback_id": "3", "comment": "Very good, thank you"},
+        None,  # failed translation: dropped so the scraper retries it next run
+    ]
+    assert tf.translate_records(rows[1:2], engine)[0] is None
+
+
+def test_detect_language_is_safe_across_threads(monkeypatch):
+    import threading
+
+    import langdetect.detector_factory as factory
+
+    monkeypatch.setattr(factory, "_factory", None)  # as in a fresh process: profiles not loaded yet
+    tf.detect_language.cache_clear()
+    texts = [f"El producto llegó roto y el vendedor no responde {i}" for i in range(8)]
+    out = {}
+    threads = [threading.Thread(target=lambda t=t: out.__setitem__(t, tf.detect_language(t))) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert set(out.values()) == {"es"}
+
+
+def test_cli_translates_in_place_and_reports_its_stages(tmp_path, monkeypatch):
+    import json
+
+    from RunMetrics import METRICS
+
+    monkeypatch.setattr(tf, "GoogleBackend", tf.FakeBackend)
+    path, report = tmp_path / "feedback.csv", tmp_path / "metrics.json"
+    path.write_text("feedback_id,comment,rating_type,date\n"
+                    "1,Great seller,Positive,Past month\n"
+                    "2,El producto llegó roto y el vendedor no responde,Negative,Past month\n", encoding="utf-8")
+    try:
+        tf.main([str(path), "--no-cache", "--rate", "1000", "--metrics", str(report)])
+    finally:
+        METRICS.disable()
+    assert path.read_text(encoding="utf-8").splitlines()[1:] == [
+        "1,Great seller,Positive,Past month",
+        "2,[en] El producto llegó roto y el vendedor no responde,Negative,Past month",
+    ]
+    stages = json.loads(report.read_text(encoding="utf-8"))["stages"]
+    assert {"translate_load", "language_detect", "translate", "translate_write"} <= set(stages)